@@ -5,7 +5,8 @@ import commands
 import handlers
 from call_types import CallTypes
 
-from backend.models import BotUser
+from backend import caching
+from backend.models import ConversationState
 from backend.templates import Keys
 
 message_handlers = {
@@ -20,12 +21,13 @@ key_handlers = {
 }
 
 state_handlers = {
-    BotUser.State.RESERVATION_TIME: handlers.reservation_time_message_handler,
-    BotUser.State.INPUT_WOKRING_TIME:
+    ConversationState.State.RESERVATION_TIME:
+        handlers.reservation_time_message_handler,
+    ConversationState.State.INPUT_WOKRING_TIME:
         handlers.region_edit_working_time_message_handler,
-    BotUser.State.INPUT_DAY_LIMIT:
+    ConversationState.State.INPUT_DAY_LIMIT:
         handlers.region_edit_day_limit_message_handler,
-    BotUser.State.INPUT_PERIOD:
+    ConversationState.State.INPUT_PERIOD:
         handlers.region_edit_period_message_handler,
 }
 
@@ -42,14 +44,14 @@ def message_handler(message):
         return
 
     chat_id = message.chat.id
-    if not BotUser.objects.filter(chat_id=chat_id).exists():
+    if caching.get_user(chat_id) is None:
         commands.start_command_handler(bot, message)
         return
 
-    user = BotUser.objects.get(chat_id=chat_id)
-    if user.bot_state:
-        if message.text not in [Keys.CANCEL, Keys.SELECT_ANOTHER_DATE]:        
-            state_handlers[user.bot_state](bot, message)
+    state = ConversationState.states.get_state(chat_id).state
+    if state:
+        if message.text not in [Keys.CANCEL, Keys.SELECT_ANOTHER_DATE]:
+            state_handlers[state](bot, message)
             return
 
     for text, handler in message_handlers.items():
@@ -92,6 +94,9 @@ callback_query_handlers = {
         handlers.region_reservations_callback_query_handler,
     CallTypes.ReservationStatusChange:
         handlers.reservation_status_change_callback_query_handler,
+    CallTypes.MarkPage: handlers.mark_page_callback_query_handler,
+    CallTypes.MarkRemaining: handlers.mark_remaining_callback_query_handler,
+    CallTypes.RegionStats: handlers.region_stats_callback_query_handler,
 }
 
 
@@ -99,10 +104,10 @@ callback_query_handlers = {
 def callback_query_handler(call):
     call_type = CallTypes.parse_data(call.data)
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
-    if user.bot_state != BotUser.State.NOTHING:
+    state = ConversationState.states.get_state(chat_id).state
+    if state != ConversationState.State.NOTHING:
         ok = False
-        if user.bot_state == BotUser.State.RESERVATION_TIME:
+        if state == ConversationState.State.RESERVATION_TIME:
             if call_type.__class__ == CallTypes.ReservationForDay:
                 ok = True
 
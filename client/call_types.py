@@ -1,6 +1,11 @@
 class CallTypeMeta(type):
-    def __new__(cls, name, *args):
+    def __new__(cls, name, *args, defaults=None):
+        # Args added to a call type get defaults, buttons sent before
+        # still carry the old ones.
+        defaults = defaults or {}
+
         def __init__(self, **kwargs):
+            kwargs = defaults | kwargs
             assert(len(args) == len(kwargs))
             for arg in args:
                 if arg.endswith('__int'):
@@ -35,7 +40,9 @@ class CallTypes():
     Menu = CallTypeMeta('Menu')
     Region = CallTypeMeta('Region', 'region_id__int')
     Reservation = CallTypeMeta('Reservation')
-    MyReservations = CallTypeMeta('MyReservations', 'page__int')
+    MyReservations = CallTypeMeta('MyReservations', 'cursor__int',
+                                  'page__int',
+                                  defaults={'cursor': 0, 'page': 1})
     SelectRegion = CallTypeMeta('SelectRegion')
     ReservationForDay = CallTypeMeta('ReservationForDay', 'days__int')
     ReservationForAnother = CallTypeMeta('ReservationForAnother')
@@ -55,12 +62,22 @@ class CallTypes():
                                     'region_id__int')
     RegionReservations = CallTypeMeta('RegionReservations',
                                       'region_id__int',
-                                      'page__int')
+                                      'cursor__int',
+                                      'page__int',
+                                      defaults={'cursor': 0, 'page': 1})
     ReservationStatusChange = CallTypeMeta('ReservationStatusChange',
                                            'reservation_id__int',
                                            'status__int')
+    MarkPage = CallTypeMeta('MarkPage',
+                            'region_id__int',
+                            'cursor__int',
+                            'page__int',
+                            'status__int')
+    MarkRemaining = CallTypeMeta('MarkRemaining', 'region_id__int')
+    RegionStats = CallTypeMeta('RegionStats', 'region_id__int')
     ReferalProgram = CallTypeMeta('ReferalProgram')
-    Referals = CallTypeMeta('Referals')
+    Referals = CallTypeMeta('Referals', 'cursor__int', 'page__int',
+                            defaults={'cursor': 0, 'page': 1})
     Contacts = CallTypeMeta('Contacts')
 
     Nothing = CallTypeMeta('Nothing')
@@ -1,7 +1,8 @@
 from telebot import TeleBot, types
 
+from backend import caching
 from backend.templates import Messages, Keys
-from backend.models import BotUser, Region
+from backend.models import BotUser, ConversationState
 
 import utils
 from call_types import CallTypes
@@ -31,42 +32,44 @@ def start_command_handler(bot: TeleBot, message):
     menu_command_handler(bot, message)
 
 
+def make_regions_keyboard():
+    keyboard = types.InlineKeyboardMarkup()
+    for region in caching.get_regions():
+        region_button = utils.make_inline_button(
+            text=region.name,
+            CallType=CallTypes.Region,
+            region_id=region.id,
+        )
+        keyboard.add(region_button)
+
+    return keyboard
+
+
+def get_regions_keyboard():
+    return caching.get_keyboard('regions', make_regions_keyboard,
+                                caching.REGIONS)
+
+
 def menu_command_handler(bot: TeleBot, message):
     chat_id = message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     if user.region:
         obj = message
         obj.message = message
         region_callback_query_handler(bot, obj)
     else:
-        keyboard = types.InlineKeyboardMarkup()
-        for region in Region.regions.all():
-            region_button = utils.make_inline_button(
-                text=region.name,
-                CallType=CallTypes.Region,
-                region_id=region.id,
-            )
-            keyboard.add(region_button)
-
+        keyboard = get_regions_keyboard()
         bot.send_message(chat_id, Messages.SELECT_REGION,
                          reply_markup=keyboard)
 
 
 def menu_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     if user.region:
         region_callback_query_handler(bot, call)
     else:
-        keyboard = types.InlineKeyboardMarkup()
-        for region in Region.regions.all():
-            region_button = utils.make_inline_button(
-                text=region.name,
-                CallType=CallTypes.Region,
-                region_id=region.id,
-            )
-            keyboard.add(region_button)
-
+        keyboard = get_regions_keyboard()
         bot.edit_message_text(
             chat_id=chat_id,
             text=Messages.SELECT_REGION,
@@ -77,12 +80,12 @@ def menu_callback_query_handler(bot: TeleBot, call):
 
 def region_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     if hasattr(call, 'data'):
         call_type = CallTypes.parse_data(call.data)
         if hasattr(call_type, 'region_id'):
             region_id = call_type.region_id
-            region = Region.regions.get(id=region_id)
+            region = caching.get_region(region_id)
             user.region = region
             user.save()
 
@@ -97,6 +100,7 @@ def region_callback_query_handler(bot: TeleBot, call):
     my_reservations_button = utils.make_inline_button(
         text=Keys.MY_RESERVATIONS,
         CallType=CallTypes.MyReservations,
+        cursor=0,
         page=1,
     )
     referal_program_button = utils.make_inline_button(
@@ -108,7 +112,7 @@ def region_callback_query_handler(bot: TeleBot, call):
     keyboard.add(my_reservations_button)
     keyboard.add(select_region_button)
     keyboard.add(referal_program_button)
-    if user.region.admins.filter(user=user):
+    if caching.is_region_admin(user.region_id, user.id):
         admin_button = utils.make_inline_button(
             text=Keys.ADMIN,
             CallType=CallTypes.Admin,
@@ -135,7 +139,7 @@ def region_callback_query_handler(bot: TeleBot, call):
 
 def select_region_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     user.region = None
     user.save()
     menu_callback_query_handler(bot, call)
@@ -143,7 +147,5 @@ def select_region_callback_query_handler(bot: TeleBot, call):
 
 def cancel_message_handler(bot: TeleBot, message):
     chat_id = message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
-    user.bot_state = BotUser.State.NOTHING
-    user.save()
+    ConversationState.states.clear(chat_id)
     menu_command_handler(bot, message)
@@ -6,15 +6,22 @@ import pytz
 from telebot import TeleBot, types
 from django_q.tasks import Schedule, schedule
 from django.utils import timezone
-from django.core.paginator import Paginator
+from django.db.models import Count
 
 import commands
 import utils
 from call_types import CallTypes
 
-from backend.models import BotUser, Reservation, Region
+from backend import caching
+from backend.analytics import get_region_report
+from backend.models import BotUser, ConversationState, Reservation
+from backend.tasks import mark_attendance
 from backend.templates import Messages, Keys, Smiles
 
+REFERALS_PAGE_SIZE = 20
+REGION_RESERVATIONS_PAGE_SIZE = 5
+REGION_STATS_DAYS = 30
+
 
 def get_reservation_info(reservation):
     tz = pytz.timezone(reservation.region.timezone)
@@ -29,7 +36,7 @@ def get_reservation_info(reservation):
 
 def reservation_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     if not utils.check_user_reservation_limit(user):
         reservation_limit_period = int(os.getenv('RESERVATION_LIMIT_PERIOD'))
         reservation_limit_count = int(os.getenv('RESERVATION_LIMIT_COUNT'))
@@ -77,7 +84,7 @@ def reservation_callback_query_handler(bot: TeleBot, call):
 
 def reservation_for_another_time_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     region = user.region
     dt = timezone.now()
     buttons = []
@@ -111,7 +118,7 @@ def reservation_for_another_time_callback_query_handler(bot: TeleBot, call):
 
 def reservation_for_day_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     if not utils.check_user_reservation_limit(user):
         reservation_limit_period = int(os.getenv('RESERVATION_LIMIT_PERIOD'))
         reservation_limit_count = int(os.getenv('RESERVATION_LIMIT_COUNT'))
@@ -149,9 +156,9 @@ def reservation_for_day_callback_query_handler(bot: TeleBot, call):
         return
 
     date = datetime.date()
-    user.temp_date = date
-    user.bot_state = BotUser.State.RESERVATION_TIME
-    user.save()
+    ConversationState.states.set_state(
+        chat_id, ConversationState.State.RESERVATION_TIME, date=date,
+    )
     keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True,
                                          one_time_keyboard=True)
     keyboard.add(Keys.SELECT_ANOTHER_DATE)
@@ -162,10 +169,10 @@ def reservation_for_day_callback_query_handler(bot: TeleBot, call):
 
 def reservation_time_message_handler(bot: TeleBot, message):
     chat_id = message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     region = user.region
     text = message.text
-    date = user.temp_date
+    date = ConversationState.states.get_state(chat_id).date
     try:
         hour, minute = map(int, text.split(':'))
         time = datetime.time(hour, minute)
@@ -213,8 +220,7 @@ def reservation_time_message_handler(bot: TeleBot, message):
         bot.send_message(chat_id, Messages.RESERVATION_FINISH,
                          reply_markup=keyboard)
         commands.menu_command_handler(bot, message)
-        user.bot_state = BotUser.State.NOTHING
-        user.save()
+        ConversationState.states.clear(chat_id)
     else:
         bot.send_message(chat_id, Messages.RESERVATION_TIME_OCCUPIED)
         next_unoccupied_time = utils.get_next_unoccupied_time(region, dt)
@@ -226,9 +232,8 @@ def reservation_time_message_handler(bot: TeleBot, message):
 
 def select_another_date_message_handler(bot: TeleBot, message):
     chat_id = message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
-    user.bot_state = BotUser.State.NOTHING
-    user.save()
+    user = caching.get_user(chat_id)
+    ConversationState.states.clear(chat_id)
     region = user.region
     dt = timezone.now()
     buttons = []
@@ -258,8 +263,13 @@ def select_another_date_message_handler(bot: TeleBot, message):
 
 def my_reservations_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
-    if not user.reservations.exists():
+    user = caching.get_user(chat_id)
+    call_type = CallTypes.parse_data(call.data)
+    page = utils.KeysetPage(user.reservations.select_related('region'),
+                            ('datetime', 'id'),
+                            cursor=call_type.cursor, size=1,
+                            number=call_type.page)
+    if not page.object_list:
         bot.answer_callback_query(
             callback_query_id=call.id,
             text=Messages.MY_RESERVATIONS_EMPTY,
@@ -267,15 +277,16 @@ def my_reservations_callback_query_handler(bot: TeleBot, call):
         )
         return
 
-    paginator = Paginator(user.reservations.all(), 1)
-    call_type = CallTypes.parse_data(call.data)
-    page_number = call_type.page
-    page = paginator.get_page(page_number)
+    num_pages = caching.get_count(
+        f'my-reservations:{user.id}', user.reservations.all(),
+        caching.user_reservations_namespace(user.id),
+    )
     back_button = utils.make_inline_button(
         text=Keys.BACK,
         CallType=CallTypes.Menu,
     )
-    keyboard = utils.make_page_keyboard(page, CallTypes.MyReservations)
+    keyboard = utils.make_keyset_keyboard(page, CallTypes.MyReservations,
+                                          num_pages=num_pages)
     keyboard.add(back_button)
     text = get_reservation_info(page.object_list[0])
     bot.edit_message_text(
@@ -297,8 +308,9 @@ def request_confirmation_accept_callback_query_handler(bot: TeleBot, call):
     bot.delete_message(chat_id, call.message.id)
     bot.send_message(chat_id, Messages.REQUEST_CONFIRMATION_ACCEPT)
 
-    name = f'confirmation-request-refuse-{reservation_id}'
-    Schedule.objects.filter(name=name).delete()
+    Reservation.reservations.filter(id=reservation_id).update(
+        confirmation_deadline=None,
+    )
 
 
 def request_confirmation_refuse_callback_query_handler(bot: TeleBot, call):
@@ -311,11 +323,9 @@ def request_confirmation_refuse_callback_query_handler(bot: TeleBot, call):
 
     bot.delete_message(chat_id, call.message.id)
     reservation.status = Reservation.Status.REFUSED
+    reservation.confirmation_deadline = None
     reservation.save()
 
-    name = f'confirmation-request-refuse-{reservation_id}'
-    Schedule.objects.filter(name=name).delete()
-
 
 def request_after_visting_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
@@ -334,7 +344,7 @@ def request_after_visting_callback_query_handler(bot: TeleBot, call):
         )
         func_name = 'backend.tasks.request_after_visiting'
         name = f'request-after-visiting-{reservation.id}'
-        schedule(func_name, reservation.id,
+        schedule(func_name, reservation.id, dt.isoformat(),
                  name=name,
                  next_run=dt,
                  schedule_type=Schedule.ONCE)
@@ -346,13 +356,14 @@ def request_after_visting_callback_query_handler(bot: TeleBot, call):
 def admin_callback_query_handler(bot: TeleBot, call):
     call_type = CallTypes.parse_data(call.data)
     region_id = call_type.region_id
-    region = Region.regions.get(id=region_id)
+    region = caching.get_region(region_id)
     chat_id = call.message.chat.id
 
     region_reservations_button = utils.make_inline_button(
         text=Keys.REGION_RESERVATIONS,
         CallType=CallTypes.RegionReservations,
         region_id=region.id,
+        cursor=0,
         page=1,
     )
     region_edit_working_time_button = utils.make_inline_button(
@@ -370,12 +381,18 @@ def admin_callback_query_handler(bot: TeleBot, call):
         CallType=CallTypes.RegionEditPeriod,
         region_id=region.id,
     )
+    region_stats_button = utils.make_inline_button(
+        text=Keys.REGION_STATS,
+        CallType=CallTypes.RegionStats,
+        region_id=region.id,
+    )
     back_button = utils.make_inline_button(
         text=Keys.BACK,
         CallType=CallTypes.Menu,
     )
     keyboard = types.InlineKeyboardMarkup()
     keyboard.add(region_reservations_button)
+    keyboard.add(region_stats_button)
     keyboard.add(region_edit_working_time_button)
     keyboard.add(region_edit_day_limit_button)
     keyboard.add(region_edit_period_button)
@@ -397,13 +414,14 @@ def admin_callback_query_handler(bot: TeleBot, call):
 
 def region_edit_working_time_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     call_type = CallTypes.parse_data(call.data)
     region_id = call_type.region_id
-    region = Region.regions.get(id=region_id)
+    region = caching.get_region(region_id)
     user.region = region
-    user.bot_state = BotUser.State.INPUT_WOKRING_TIME
     user.save()
+    ConversationState.states.set_state(chat_id,
+                                       ConversationState.State.INPUT_WOKRING_TIME)
     keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
     keyboard.add(Keys.CANCEL)
     bot.send_message(chat_id, Messages.INPUT_WORKING_TIME,
@@ -412,7 +430,7 @@ def region_edit_working_time_callback_query_handler(bot: TeleBot, call):
 
 def region_edit_working_time_message_handler(bot: TeleBot, message):
     chat_id = message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     region = user.region
     try:
         t1, t2 = message.text.split()
@@ -426,8 +444,7 @@ def region_edit_working_time_message_handler(bot: TeleBot, message):
         region.working_time_from = working_time_from
         region.working_time_to = working_time_to
         region.save()
-        user.bot_state = BotUser.State.NOTHING
-        user.save()
+        ConversationState.states.clear(chat_id)
         keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
         keyboard.add(Keys.MENU)
         bot.send_message(chat_id, Messages.SAVED,
@@ -439,13 +456,14 @@ def region_edit_working_time_message_handler(bot: TeleBot, message):
 
 def region_edit_day_limit_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     call_type = CallTypes.parse_data(call.data)
     region_id = call_type.region_id
-    region = Region.regions.get(id=region_id)
+    region = caching.get_region(region_id)
     user.region = region
-    user.bot_state = BotUser.State.INPUT_DAY_LIMIT
     user.save()
+    ConversationState.states.set_state(chat_id,
+                                       ConversationState.State.INPUT_DAY_LIMIT)
     keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
     keyboard.add(Keys.CANCEL)
     bot.send_message(chat_id, Messages.INPUT_NUMBER,
@@ -454,14 +472,13 @@ def region_edit_day_limit_callback_query_handler(bot: TeleBot, call):
 
 def region_edit_day_limit_message_handler(bot: TeleBot, message):
     chat_id = message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     region = user.region
     try:
         day_limit = int(message.text)
         region.day_limit = day_limit
         region.save()
-        user.bot_state = BotUser.State.NOTHING
-        user.save()
+        ConversationState.states.clear(chat_id)
         keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
         keyboard.add(Keys.MENU)
         bot.send_message(chat_id, Messages.SAVED,
@@ -472,13 +489,14 @@ def region_edit_day_limit_message_handler(bot: TeleBot, message):
 
 def region_edit_period_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     call_type = CallTypes.parse_data(call.data)
     region_id = call_type.region_id
-    region = Region.regions.get(id=region_id)
+    region = caching.get_region(region_id)
     user.region = region
-    user.bot_state = BotUser.State.INPUT_PERIOD
     user.save()
+    ConversationState.states.set_state(chat_id,
+                                       ConversationState.State.INPUT_PERIOD)
     keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
     keyboard.add(Keys.CANCEL)
     bot.send_message(chat_id, Messages.INPUT_NUMBER,
@@ -487,14 +505,13 @@ def region_edit_period_callback_query_handler(bot: TeleBot, call):
 
 def region_edit_period_message_handler(bot: TeleBot, message):
     chat_id = message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
     region = user.region
     try:
         period = int(message.text)
         region.period = period
         region.save()
-        user.bot_state = BotUser.State.NOTHING
-        user.save()
+        ConversationState.states.clear(chat_id)
         keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
         keyboard.add(Keys.MENU)
         bot.send_message(chat_id, Messages.SAVED,
@@ -503,22 +520,42 @@ def region_edit_period_message_handler(bot: TeleBot, message):
         bot.send_message(chat_id, Messages.INCORRECT_FORMAT)
 
 
+def get_region_reservations(region):
+    dt_range = utils.get_datetime_range_for_day(timezone.now())
+    return region.reservations(manager='actual').filter(
+        datetime__range=dt_range
+    )
+
+
+def get_region_reservations_page(region, cursor, page_number):
+    return utils.KeysetPage(get_region_reservations(region),
+                            ('datetime', 'id'),
+                            cursor=cursor,
+                            size=REGION_RESERVATIONS_PAGE_SIZE,
+                            number=page_number)
+
+
 def region_reservations_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
     call_type = CallTypes.parse_data(call.data)
     region_id = call_type.region_id
-    region = Region.regions.get(id=region_id)
-    page_number = call_type.page
+    region = caching.get_region(region_id)
     text = utils.text_to_fat(Keys.REGION_RESERVATIONS)
     text += '\n\n'
     dt_range = utils.get_datetime_range_for_day(timezone.now())
-    reservations = region.reservations(manager='actual').filter(
-        datetime__range=dt_range
+    reservations = get_region_reservations(region)
+    page = get_region_reservations_page(region, call_type.cursor,
+                                        call_type.page)
+    count = caching.get_count(
+        f'region-reservations:{region.id}:{dt_range[0].date()}',
+        reservations, caching.region_reservations_namespace(region.id),
     )
-    paginator = Paginator(reservations, 5)
-    page = paginator.get_page(page_number)
-    keyboard = utils.make_page_keyboard(page, CallTypes.RegionReservations)
-    for index, reservation in enumerate(page, 1):
+    num_pages = (count - 1) // REGION_RESERVATIONS_PAGE_SIZE + 1
+    keyboard = utils.make_keyset_keyboard(page, CallTypes.RegionReservations,
+                                          num_pages=num_pages,
+                                          region_id=region.id)
+    start = (page.number - 1) * REGION_RESERVATIONS_PAGE_SIZE
+    for index, reservation in enumerate(page, start + 1):
         reservation_info = Messages.REGION_RESERVATION_INFO.format(
             id=reservation.id,
             datetime=reservation.get_datetime(),
@@ -546,6 +583,28 @@ def region_reservations_callback_query_handler(bot: TeleBot, call):
         ))
         text += reservation_info + '\n\n'
 
+    if page.object_list:
+        keyboard.add(utils.make_inline_button(
+            text=Keys.COME_ALL_ON_PAGE,
+            CallType=CallTypes.MarkPage,
+            region_id=region.id,
+            cursor=call_type.cursor,
+            page=page.number,
+            status=Reservation.Status.CONFIRMED,
+        ), utils.make_inline_button(
+            text=Keys.NOT_COME_ALL_ON_PAGE,
+            CallType=CallTypes.MarkPage,
+            region_id=region.id,
+            cursor=call_type.cursor,
+            page=page.number,
+            status=Reservation.Status.DID_NOT_COME,
+        ))
+        keyboard.add(utils.make_inline_button(
+            text=Keys.NOT_COME_ALL_REMAINING,
+            CallType=CallTypes.MarkRemaining,
+            region_id=region.id,
+        ))
+
     back_button = utils.make_inline_button(
         text=Keys.BACK,
         CallType=CallTypes.Menu,
@@ -559,15 +618,85 @@ def region_reservations_callback_query_handler(bot: TeleBot, call):
     )
 
 
+def region_stats_callback_query_handler(bot: TeleBot, call):
+    chat_id = call.message.chat.id
+    call_type = CallTypes.parse_data(call.data)
+    region = caching.get_region(call_type.region_id)
+    report = get_region_report(region.id, days=REGION_STATS_DAYS)
+    text = Messages.REGION_STATS.format(days=REGION_STATS_DAYS)
+    text += '\n\n'
+    text += Messages.REGION_STATS_TOTAL.format(total=report['total']) + '\n'
+    for status, count in report['by_status'].items():
+        text += f'{Reservation.Status(status).label}: <b>{count}</b>\n'
+
+    if report['no_show_rate'] is not None:
+        text += Messages.REGION_STATS_NO_SHOW_RATE.format(
+            no_show_rate=report['no_show_rate'],
+        ) + '\n'
+
+    if report['by_hour']:
+        text += '\n'
+        for hour, count in report['by_hour']:
+            text += f'<code>{hour:02}:00</code> — {count}\n'
+
+    back_button = utils.make_inline_button(
+        text=Keys.BACK,
+        CallType=CallTypes.Admin,
+        region_id=region.id,
+    )
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(back_button)
+    bot.edit_message_text(
+        chat_id=chat_id,
+        text=text,
+        message_id=call.message.id,
+        reply_markup=keyboard,
+    )
+
+
 def reservation_status_change_callback_query_handler(bot: TeleBot, call):
     call_type = CallTypes.parse_data(call.data)
-    reservation_id = call_type.reservation_id
-    reservation = Reservation.reservations.get(id=reservation_id)
-    status = call_type.status
-    reservation.status = status
-    reservation.save()
-    call_type = CallTypes.RegionReservations(region_id=reservation.region.id,
-                                             page=1)
+    reservations = Reservation.reservations.filter(
+        id=call_type.reservation_id,
+    )
+    region_id = reservations.values_list('region_id', flat=True).get()
+    mark_attendance(reservations, call_type.status)
+    call_type = CallTypes.RegionReservations(region_id=region_id,
+                                             cursor=0, page=1)
+    call.data = CallTypes.make_data(call_type)
+    region_reservations_callback_query_handler(bot, call)
+
+
+def mark_page_callback_query_handler(bot: TeleBot, call):
+    call_type = CallTypes.parse_data(call.data)
+    region = caching.get_region(call_type.region_id)
+    page = get_region_reservations_page(region, call_type.cursor,
+                                        call_type.page)
+    reservations = Reservation.reservations.filter(
+        id__in=[reservation.id for reservation in page],
+    )
+    mark_attendance(reservations, call_type.status)
+    call_type = CallTypes.RegionReservations(region_id=region.id,
+                                             cursor=call_type.cursor,
+                                             page=page.number)
+    call.data = CallTypes.make_data(call_type)
+    region_reservations_callback_query_handler(bot, call)
+
+
+def mark_remaining_callback_query_handler(bot: TeleBot, call):
+    call_type = CallTypes.parse_data(call.data)
+    region = caching.get_region(call_type.region_id)
+    reservations = get_region_reservations(region).filter(
+        datetime__lte=timezone.now(),
+        status=Reservation.Status.RESERVED,
+    )
+    count = mark_attendance(reservations, Reservation.Status.DID_NOT_COME)
+    bot.answer_callback_query(
+        callback_query_id=call.id,
+        text=Messages.NOT_COME_MARKED.format(count=count),
+    )
+    call_type = CallTypes.RegionReservations(region_id=region.id,
+                                             cursor=0, page=1)
     call.data = CallTypes.make_data(call_type)
     region_reservations_callback_query_handler(bot, call)
 
@@ -577,6 +706,8 @@ def referal_program_callback_query_handler(bot: TeleBot, call):
     referals_button = utils.make_inline_button(
         text=Keys.REFERALS,
         CallType=CallTypes.Referals,
+        cursor=0,
+        page=1,
     )
     back_button = utils.make_inline_button(
         text=Keys.BACK,
@@ -597,17 +728,35 @@ def referal_program_callback_query_handler(bot: TeleBot, call):
 
 def referals_callback_query_handler(bot: TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.objects.get(chat_id=chat_id)
+    user = caching.get_user(chat_id)
+    call_type = CallTypes.parse_data(call.data)
+    levels = BotUser.objects.get_referral_levels(user.id)
     text = utils.text_to_fat(Keys.REFERALS)
     text += '\n\n'
-    for index, referal in enumerate(user.referals.all(), 1):
-        text += f'<b>{index}.</b> <code>{referal.chat_id}</code>\n'
+    for level, count in levels:
+        text += Messages.REFERAL_LEVEL.format(level=level, count=count)
+        text += '\n'
+
+    referals = user.referals.annotate(referals_count=Count('referals'))
+    page = utils.KeysetPage(referals, ('id',), cursor=call_type.cursor,
+                            size=REFERALS_PAGE_SIZE, number=call_type.page)
+    direct_count = dict(levels).get(1, 0)
+    num_pages = (direct_count - 1) // REFERALS_PAGE_SIZE + 1
+    text += '\n'
+    start = (page.number - 1) * REFERALS_PAGE_SIZE
+    for index, referal in enumerate(page, start + 1):
+        text += f'<b>{index}.</b> <code>{referal.chat_id}</code>'
+        if referal.referals_count:
+            text += f' (+{referal.referals_count})'
+
+        text += '\n'
 
     back_button = utils.make_inline_button(
         text=Keys.BACK,
         CallType=CallTypes.ReferalProgram,
     )
-    keyboard = types.InlineKeyboardMarkup()
+    keyboard = utils.make_keyset_keyboard(page, CallTypes.Referals,
+                                          num_pages=num_pages)
     keyboard.add(back_button)
     bot.edit_message_text(
         chat_id=chat_id,
@@ -5,8 +5,8 @@ import requests
 import telebot
 from telebot import types
 
+from django.db.models import Q
 from django.utils import timezone
-from django.core.paginator import Page
 
 from bs4 import BeautifulSoup
 from bs4.element import NavigableString, Tag
@@ -24,6 +24,9 @@ except Exception:
 
 from backend.templates import Smiles
 
+# Telegram rejects a button whose callback_data is longer.
+CALLBACK_DATA_MAX_LENGTH = 64
+
 
 def seconds_to_time_str(seconds: int):
     minutes, seconds = seconds // 60, seconds % 60
@@ -128,20 +131,96 @@ def get_file_text(file_id):
         return response.text
 
 
-def make_page_keyboard(page: Page, CallType, **kwargs):
+class KeysetPage:
+    """
+    One page of a queryset walked by cursor instead of OFFSET.
+
+    The cursor is the id of the row the page starts after, or, when
+    negative, the id of the row it ends before. Only the id travels in
+    callback data (64 bytes at most), the remaining ordering values are
+    read back from that row.
+    """
+
+    def __init__(self, queryset, ordering, cursor=0, size=5, number=1):
+        self.number = max(number, 1)
+        model = queryset.model
+        backwards = cursor < 0
+        if cursor and (row := model._default_manager.filter(
+                id=abs(cursor)).values(*ordering).first()):
+            queryset = queryset.filter(
+                get_keyset_filter(row, ordering, backwards)
+            )
+        else:
+            backwards = False
+            self.number = 1
+
+        if backwards:
+            queryset = queryset.order_by(*[f'-{field}' for field in ordering])
+        else:
+            queryset = queryset.order_by(*ordering)
+
+        object_list = list(queryset[:size + 1])
+        has_more = len(object_list) > size
+        object_list = object_list[:size]
+        if backwards:
+            object_list.reverse()
+            self._has_previous, self._has_next = has_more, True
+            if not has_more:
+                self.number = 1
+        else:
+            self._has_previous, self._has_next = self.number > 1, has_more
+
+        self.object_list = object_list
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def previous_cursor(self):
+        return -self.object_list[0].id
+
+    def next_cursor(self):
+        return self.object_list[-1].id
+
+
+def get_keyset_filter(row, ordering, backwards=False):
+    lookup = 'lt' if backwards else 'gt'
+    q = Q()
+    for index, field in enumerate(ordering):
+        equal = {prev: row[prev] for prev in ordering[:index]}
+        q |= Q(**equal, **{f'{field}__{lookup}': row[field]})
+
+    return q
+
+
+def make_keyset_keyboard(page: KeysetPage, CallType, num_pages=None,
+                         **kwargs):
     keyboard = types.InlineKeyboardMarkup(row_width=5)
     buttons = []
     if page.has_previous():
         prev_page_button = make_inline_button(
             text=f'{Smiles.PREV_PAGE}',
             CallType=CallType,
-            page=page.previous_page_number(),
+            cursor=page.previous_cursor(),
+            page=page.number - 1,
             **kwargs,
         )
         buttons.append(prev_page_button)
 
+    page_number_text = str(page.number)
+    if num_pages:
+        page_number_text += ' из ' + str(num_pages)
+
     page_number_button = make_inline_button(
-        text=str(page.number) + ' из ' + str(page.paginator.num_pages),
+        text=page_number_text,
         CallType=CallTypes.Nothing,
     )
     buttons.append(page_number_button)
@@ -150,7 +229,8 @@ def make_page_keyboard(page: Page, CallType, **kwargs):
         next_page_button = make_inline_button(
             text=f'{Smiles.NEXT_PAGE}',
             CallType=CallType,
-            page=page.next_page_number(),
+            cursor=page.next_cursor(),
+            page=page.number + 1,
             **kwargs,
         )
         buttons.append(next_page_button)
@@ -162,6 +242,10 @@ def make_page_keyboard(page: Page, CallType, **kwargs):
 def make_inline_button(text, CallType, **kwargs):
     call_type = CallType(**kwargs)
     call_data = CallTypes.make_data(call_type)
+    if len(call_data.encode()) > CALLBACK_DATA_MAX_LENGTH:
+        raise ValueError(f'callback_data is longer than '
+                         f'{CALLBACK_DATA_MAX_LENGTH} bytes: {call_data}')
+
     button = types.InlineKeyboardButton(
         text=text,
         callback_data=call_data,
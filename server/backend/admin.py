@@ -1,6 +1,11 @@
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.urls import path
 
-from .models import BotUser, Reservation, Region, RegionAdmin, Template
+from .export import export_reservations
+
+from .models import (BotUser, Reservation, ReservationHistory,
+                     ReservationRollup, Region, RegionAdmin, Template)
 
 
 class RegionAdminInlineAdmin(admin.TabularInline):
@@ -20,10 +25,76 @@ class RegionAdmin_(admin.ModelAdmin):
     inlines = [RegionAdminInlineAdmin]
 
 
+class ExportAdminMixin:
+    """
+    Streams the selected rows, or the whole filtered changelist from
+    export/csv/ and export/xlsx/, as a file.
+    """
+    actions = ['export_csv', 'export_xlsx']
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        urls = [
+            path('export/<str:file_format>/',
+                 self.admin_site.admin_view(self.export_view),
+                 name='%s_%s_export' % info),
+        ]
+        return urls + super().get_urls()
+
+    def export_view(self, request, file_format):
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+
+        changelist = self.get_changelist_instance(request)
+        return export_reservations(changelist.get_queryset(request),
+                                   file_format)
+
+    @admin.action(description='Выгрузить в CSV')
+    def export_csv(self, request, queryset):
+        return export_reservations(queryset, 'csv')
+
+    @admin.action(description='Выгрузить в XLSX')
+    def export_xlsx(self, request, queryset):
+        return export_reservations(queryset, 'xlsx')
+
+
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(ExportAdminMixin, admin.ModelAdmin):
     list_display = ['id', 'region', 'user', 'status', 'get_datetime']
     list_filter = ['region', 'status']
+    date_hierarchy = 'datetime'
+
+
+@admin.register(ReservationHistory)
+class ReservationHistoryAdmin(ExportAdminMixin, admin.ModelAdmin):
+    list_display = ['id', 'region', 'user', 'status', 'get_datetime',
+                    'archived']
+    list_filter = ['region', 'status', 'archived']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReservationRollup)
+class ReservationRollupAdmin(admin.ModelAdmin):
+    list_display = ['region', 'date', 'hour', 'status', 'count']
+    list_filter = ['region', 'status', 'hour']
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Template)
@@ -0,0 +1,117 @@
+from collections import Counter
+
+import pytz
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import caching
+from .models import (Region, Reservation, ReservationHistory,
+                     ReservationRollup)
+
+NO_SHOW_STATUSES = (Reservation.Status.DID_NOT_COME,)
+VISITED_STATUSES = (Reservation.Status.CONFIRMED, Reservation.Status.OK)
+
+
+def get_timezones():
+    return {region.id: pytz.timezone(region.timezone)
+            for region in caching.get_regions()}
+
+
+def get_bucket(timezones, region_id, dt, status):
+    if region_id not in timezones:
+        region = Region.regions.get(id=region_id)
+        timezones[region_id] = pytz.timezone(region.timezone)
+
+    local_dt = dt.astimezone(timezones[region_id])
+    return (region_id, local_dt.date(), local_dt.hour, status)
+
+
+def count_buckets(rows, sign=1, timezones=None):
+    """
+    Turns (region_id, datetime, status) rows into rollup deltas.
+    """
+    if timezones is None:
+        timezones = get_timezones()
+
+    changes = Counter()
+    for region_id, dt, status in rows:
+        changes[get_bucket(timezones, region_id, dt, status)] += sign
+
+    return changes
+
+
+def record_created(rows):
+    ReservationRollup.rollups.add(count_buckets(rows))
+
+
+def record_deleted(rows):
+    ReservationRollup.rollups.add(count_buckets(rows, sign=-1))
+
+
+def record_status_change(rows, status):
+    """
+    rows are (region_id, datetime, old_status) of reservations that
+    have just been moved to status.
+    """
+    rows = [row for row in rows if row[2] != status]
+    changes = count_buckets(rows, sign=-1)
+    changes.update(count_buckets(
+        [(region_id, dt, status) for region_id, dt, _ in rows]
+    ))
+    ReservationRollup.rollups.add(changes)
+
+
+def rebuild_rollups(region_ids=None, chunk_size=2000):
+    """
+    Recounts the rollups from the hot and archived reservations.
+    """
+    history = ReservationHistory.history.order_by()
+    rollups = ReservationRollup.rollups.all()
+    if region_ids:
+        history = history.filter(region_id__in=region_ids)
+        rollups = rollups.filter(region_id__in=region_ids)
+
+    timezones = get_timezones()
+    changes = count_buckets(
+        history.values_list('region_id', 'datetime', 'status')
+        .iterator(chunk_size=chunk_size),
+        timezones=timezones,
+    )
+    with transaction.atomic():
+        rollups.delete()
+        ReservationRollup.rollups.bulk_create([
+            ReservationRollup(region_id=region_id, date=date, hour=hour,
+                              status=status, count=count)
+            for (region_id, date, hour, status), count in changes.items()
+            if count
+        ], batch_size=chunk_size)
+
+    return sum(changes.values())
+
+
+def get_region_report(region_id, days=30):
+    # The rollups are bucketed by the region's local date.
+    tz = pytz.timezone(caching.get_region(region_id).timezone)
+    date_from = timezone.localdate(timezone=tz) - timezone.timedelta(days=days)
+    rollups = ReservationRollup.rollups.filter(region_id=region_id,
+                                               date__gte=date_from)
+    by_status = dict(
+        rollups.values_list('status').annotate(total=Sum('count'))
+        .order_by('status')
+    )
+    by_hour = list(
+        rollups.exclude(status=Reservation.Status.REFUSED)
+        .values_list('hour').annotate(total=Sum('count'))
+        .order_by('hour')
+    )
+    no_shows = sum(by_status.get(status, 0) for status in NO_SHOW_STATUSES)
+    visits = sum(by_status.get(status, 0) for status in VISITED_STATUSES)
+    return {
+        'total': sum(by_status.values()),
+        'by_status': by_status,
+        'by_hour': by_hour,
+        'no_show_rate': (
+            no_shows / (no_shows + visits) if no_shows + visits else None
+        ),
+    }
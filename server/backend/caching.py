@@ -0,0 +1,111 @@
+import time
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import BotUser, Region, RegionAdmin
+
+USERS = 'users'
+REGIONS = 'regions'
+REGION_ADMINS = 'region-admins'
+KEYBOARDS = 'keyboards'
+RESERVATIONS = 'reservations'
+
+
+def get_timeout():
+    return getattr(settings, 'CACHE_TIMEOUT', 300)
+
+
+def get_version(namespace: str) -> int:
+    # Seeded from the clock, so a version key evicted on its own never
+    # comes back with a number an older entry was stored under.
+    return cache.get_or_set(f'version:{namespace}', time.time_ns(), None)
+
+
+def bump_version(namespace: str):
+    key = f'version:{namespace}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def make_key(name: str, *namespaces: str) -> str:
+    versions = ':'.join(str(get_version(namespace))
+                        for namespace in namespaces)
+    return f'{name}:{versions}'
+
+
+def get_or_build(name: str, build: Callable, *namespaces: str):
+    key = make_key(name, *namespaces)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        if value is not None:
+            cache.set(key, value, get_timeout())
+
+    return value
+
+
+def user_namespace(chat_id) -> str:
+    return f'{USERS}:{chat_id}'
+
+
+def get_user(chat_id) -> Optional[BotUser]:
+    def build():
+        return (BotUser.objects.select_related('region')
+                .filter(chat_id=chat_id).first())
+
+    return get_or_build(f'user:{chat_id}', build,
+                        user_namespace(chat_id), REGIONS)
+
+
+def get_regions() -> list[Region]:
+    return get_or_build('regions', lambda: list(Region.regions.all()),
+                        REGIONS)
+
+
+def get_region(region_id: int) -> Region:
+    for region in get_regions():
+        if region.id == int(region_id):
+            return region
+
+    raise Region.DoesNotExist
+
+
+def get_region_admin_ids(region_id: int) -> set[int]:
+    def build():
+        return set(RegionAdmin.objects.filter(region_id=region_id)
+                   .values_list('user_id', flat=True))
+
+    return get_or_build(f'region-admins:{region_id}', build, REGION_ADMINS)
+
+
+def is_region_admin(region_id: int, user_id: int) -> bool:
+    return user_id in get_region_admin_ids(region_id)
+
+
+def get_keyboard(name: str, build: Callable, *namespaces: str):
+    return get_or_build(f'keyboard:{name}', build, KEYBOARDS, *namespaces)
+
+
+def user_reservations_namespace(user_id) -> str:
+    return f'{RESERVATIONS}:user:{user_id}'
+
+
+def region_reservations_namespace(region_id) -> str:
+    return f'{RESERVATIONS}:region:{region_id}'
+
+
+def bump_reservation_versions(user_ids, region_ids):
+    # For the bulk updates, which send no post_save.
+    for user_id in set(user_ids):
+        bump_version(user_reservations_namespace(user_id))
+
+    for region_id in set(region_ids):
+        bump_version(region_reservations_namespace(region_id))
+
+
+def get_count(name: str, queryset, *namespaces: str) -> int:
+    return get_or_build(f'count:{name}', queryset.count, *namespaces)
@@ -0,0 +1,166 @@
+import csv
+import zipfile
+from xml.sax.saxutils import escape
+
+import pytz
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .routers import use_replica
+
+CHUNK_SIZE = 2000
+DATETIME_FORMAT = '%Y-%m-%d %H:%M'
+
+HEADER = ['ID', 'Регион', 'Chat ID', 'Username', 'Дата и время', 'Статус',
+          'Создана', 'Обновлена']
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': ('application/vnd.openxmlformats-officedocument.'
+             'spreadsheetml.sheet'),
+}
+
+XLSX_FILES = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Reservations" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def iter_reservation_rows(queryset, chunk_size=CHUNK_SIZE):
+    timezones = {}
+    reservations = queryset.select_related('user', 'region').order_by('id')
+    for reservation in reservations.iterator(chunk_size=chunk_size):
+        region = reservation.region
+        if region.id not in timezones:
+            timezones[region.id] = pytz.timezone(region.timezone)
+
+        tz = timezones[region.id]
+        yield [
+            reservation.id,
+            region.name,
+            reservation.user.chat_id,
+            reservation.user.username or '',
+            reservation.datetime.astimezone(tz).strftime(DATETIME_FORMAT),
+            reservation.get_status_display(),
+            reservation.created.astimezone(tz).strftime(DATETIME_FORMAT),
+            reservation.updated.astimezone(tz).strftime(DATETIME_FORMAT),
+        ]
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    # The BOM makes Excel read the file as UTF-8.
+    yield '\ufeff' + writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class StreamBuffer:
+    """
+    Write-only file for ZipFile, drained by the generator after each
+    chunk. Having no tell() makes ZipFile write streaming headers.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def make_xlsx_row(row):
+    cells = []
+    for value in row:
+        if isinstance(value, int):
+            cells.append(f'<c t="n"><v>{value}</v></c>')
+        else:
+            cells.append(f'<c t="inlineStr"><is><t>{escape(str(value))}</t>'
+                         f'</is></c>')
+
+    return f'<row>{"".join(cells)}</row>'
+
+
+def stream_xlsx(rows, chunk_size=CHUNK_SIZE):
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_FILES.items():
+            archive.writestr(name, content)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w',
+                          force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/'
+                b'spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(make_xlsx_row(HEADER).encode())
+            for index, row in enumerate(rows, 1):
+                sheet.write(make_xlsx_row(row).encode())
+                if index % chunk_size == 0:
+                    yield buffer.pop()
+
+            sheet.write(b'</sheetData></worksheet>')
+
+    yield buffer.pop()
+
+
+def stream_on_replica(stream):
+    # The response body is read after the middleware has returned, so
+    # the replica routing is entered again around the iteration.
+    with use_replica():
+        yield from stream
+
+
+def export_reservations(queryset, file_format='csv'):
+    rows = iter_reservation_rows(queryset)
+    if file_format == 'xlsx':
+        stream = stream_xlsx(rows)
+    else:
+        file_format = 'csv'
+        stream = stream_csv(rows)
+
+    response = StreamingHttpResponse(stream_on_replica(stream),
+                                     content_type=CONTENT_TYPES[file_format])
+    filename = timezone.now().strftime(f'reservations-%Y%m%d-%H%M.{file_format}')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,248 @@
+import csv
+import json
+from itertools import islice
+
+import pytz
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django_q.models import Schedule
+
+from . import analytics, caching
+from .models import BotUser, Region, Reservation
+from .signals import get_reservation_schedules
+
+REGION_FIELDS = ['name', 'address', 'timezone', 'working_time_from',
+                 'working_time_to', 'day_limit', 'period']
+USER_FIELDS = ['chat_id', 'username', 'first_name', 'last_name']
+RESERVATION_FIELDS = ['datetime', 'status']
+
+
+def read_records(path, file_format=None):
+    file_format = file_format or path.rsplit('.', 1)[-1].lower()
+    with open(path, encoding='utf-8-sig', newline='') as file:
+        if file_format == 'csv':
+            yield from csv.DictReader(file)
+        elif file_format in ('jsonl', 'json'):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f'Unknown format: {file_format}')
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def get_values(model, record, field_names):
+    values = {}
+    for name in field_names:
+        if name not in record:
+            continue
+
+        field = model._meta.get_field(name)
+        value = record[name]
+        if value == '' and field.null:
+            value = None
+
+        values[name] = field.to_python(value)
+
+    return values
+
+
+def import_regions(records, batch_size=1000):
+    existing = set(Region.regions.values_list('name', flat=True))
+    created = 0
+    for chunk in chunked(records, batch_size):
+        regions = []
+        for record in chunk:
+            if record['name'] in existing:
+                continue
+
+            existing.add(record['name'])
+            regions.append(Region(**get_values(Region, record, REGION_FIELDS)))
+
+        with transaction.atomic():
+            created += len(Region.regions.bulk_create(regions))
+
+    caching.bump_version(caching.REGIONS)
+    return {'regions': created}
+
+
+def import_users(records, batch_size=1000):
+    """
+    Users are matched by chat_id, the region by name and the referrer
+    (from_user) by chat_id. Existing users are left as they are, so only
+    the users created here get a referrer, linked after every user is in.
+    """
+    region_ids = dict(Region.regions.values_list('name', 'id'))
+    seen = set()
+    referrers = []
+    count = BotUser.objects.count()
+    for chunk in chunked(records, batch_size):
+        chat_ids = {str(record['chat_id']) for record in chunk}
+        seen.update(BotUser.objects.filter(chat_id__in=chat_ids)
+                    .values_list('chat_id', flat=True))
+        users = []
+        for record in chunk:
+            user = BotUser(**get_values(BotUser, record, USER_FIELDS))
+            if user.chat_id in seen:
+                continue
+
+            seen.add(user.chat_id)
+            user.region_id = region_ids.get(record.get('region'))
+            if record.get('from_user'):
+                referrers.append((user.chat_id, str(record['from_user'])))
+
+            users.append(user)
+
+        with transaction.atomic():
+            BotUser.objects.bulk_create(users, ignore_conflicts=True)
+
+    created = BotUser.objects.count() - count
+
+    linked = 0
+    for chunk in chunked(referrers, batch_size):
+        chat_ids = {chat_id for pair in chunk for chat_id in pair}
+        user_ids = dict(BotUser.objects.filter(chat_id__in=chat_ids)
+                        .values_list('chat_id', 'id'))
+        pairs = [
+            (chat_id, from_chat_id) for chat_id, from_chat_id in chunk
+            if chat_id in user_ids and from_chat_id in user_ids
+            and chat_id != from_chat_id
+        ]
+        users = [
+            BotUser(id=user_ids[chat_id], from_user_id=user_ids[from_chat_id])
+            for chat_id, from_chat_id in pairs
+        ]
+        with transaction.atomic():
+            BotUser.objects.bulk_update(users, ['from_user'])
+
+        # bulk_update sends no post_save, the cached users are dropped here.
+        for chat_id, _ in pairs:
+            caching.bump_version(caching.user_namespace(chat_id))
+
+        linked += len(users)
+
+    return {'users': created, 'referrals': linked}
+
+
+def import_reservations(records, batch_size=1000):
+    """
+    Reservations reference their user by chat_id and their region by
+    name. Naive datetimes are taken as the region's local time. Rows
+    matching a stored or earlier one on user, region and datetime are
+    counted as duplicates, so the import can be run again. A record
+    without a valid datetime stops it with a ValueError naming the
+    record, the chunks before it stay imported.
+
+    bulk_create sends no post_save, so nothing is scheduled per row. The
+    rollups are counted per chunk and the reminders of the still
+    upcoming reservations are created in one pass at the end.
+    """
+    regions = {region.name: region for region in Region.regions.all()}
+    region_ids = set()
+    reservation_user_ids = set()
+    seen = set()
+    reserved_ids = []
+    created = 0
+    skipped = 0
+    duplicates = 0
+    for chunk in chunked(enumerate(records, 1), batch_size):
+        chat_ids = {str(record['user']) for _, record in chunk}
+        user_ids = dict(BotUser.objects.filter(chat_id__in=chat_ids)
+                        .values_list('chat_id', 'id'))
+        reservations = []
+        for number, record in chunk:
+            region = regions.get(record['region'])
+            user_id = user_ids.get(str(record['user']))
+            if region is None or user_id is None:
+                skipped += 1
+                continue
+
+            try:
+                values = get_values(Reservation, record, RESERVATION_FIELDS)
+            except ValidationError as e:
+                raise ValueError(f'record {number}: {" ".join(e.messages)}')
+
+            if values.get('datetime') is None:
+                raise ValueError(f'record {number}: datetime is required')
+
+            if timezone.is_naive(values['datetime']):
+                values['datetime'] = pytz.timezone(region.timezone).localize(
+                    values['datetime']
+                )
+
+            reservations.append(Reservation(region_id=region.id,
+                                            user_id=user_id, **values))
+
+        seen.update(Reservation.reservations.filter(
+            user_id__in={reservation.user_id for reservation in reservations},
+            datetime__in={reservation.datetime for reservation in reservations},
+        ).values_list('user_id', 'region_id', 'datetime'))
+        new_reservations = []
+        for reservation in reservations:
+            key = (reservation.user_id, reservation.region_id,
+                   reservation.datetime)
+            if key in seen:
+                duplicates += 1
+                continue
+
+            seen.add(key)
+            region_ids.add(reservation.region_id)
+            reservation_user_ids.add(reservation.user_id)
+            new_reservations.append(reservation)
+
+        with transaction.atomic():
+            reservations = Reservation.reservations.bulk_create(
+                new_reservations
+            )
+            analytics.record_created([
+                (reservation.region_id, reservation.datetime,
+                 reservation.status)
+                for reservation in reservations
+            ])
+
+        created += len(reservations)
+        now = timezone.now()
+        reserved_ids += [
+            reservation.id for reservation in reservations
+            if reservation.status == Reservation.Status.RESERVED
+            and reservation.datetime > now
+        ]
+
+    scheduled = schedule_reminders(reserved_ids, batch_size)
+    caching.bump_reservation_versions(reservation_user_ids, region_ids)
+
+    return {'reservations': created, 'skipped': skipped,
+            'duplicates': duplicates, 'schedules': scheduled}
+
+
+def schedule_reminders(reservation_ids, batch_size=1000):
+    """
+    Creates the reminder schedules of the given reservations in one pass,
+    what reservation_post_save_handler does for a single saved one.
+    """
+    scheduled = 0
+    for chunk in chunked(reservation_ids, batch_size):
+        schedules = [
+            Schedule(func=func_name, args=repr(args), name=name,
+                     schedule_type=Schedule.ONCE, repeats=-1, next_run=dt)
+            for reservation in Reservation.reservations.filter(id__in=chunk)
+            for func_name, args, name, dt in
+            get_reservation_schedules(reservation)
+        ]
+        with transaction.atomic():
+            scheduled += len(Schedule.objects.bulk_create(schedules))
+
+    return scheduled
+
+
+IMPORTERS = {
+    'regions': import_regions,
+    'users': import_users,
+    'reservations': import_reservations,
+}
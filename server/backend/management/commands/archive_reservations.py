@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from backend.retention import archive_past_reservations
+
+
+class Command(BaseCommand):
+    help = 'Moves reservations older than the archive period into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Archive period, RESERVATION_ARCHIVE_DAYS by default')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        archived = archive_past_reservations(
+            days=options['days'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(f'Archived {archived} reservations')
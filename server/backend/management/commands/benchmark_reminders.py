@@ -0,0 +1,261 @@
+import ast
+import datetime
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from importlib import import_module
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Max
+from django.test.utils import override_settings
+from django.utils import timezone
+from django_q.models import Schedule
+
+from backend import signals, tasks
+from backend.metrics import REMINDER_FUNCS, summarize
+from backend.models import BotUser, Region, ReminderClaim, Reservation
+
+REGION_NAME = 'Benchmark region'
+
+
+class FakeClock:
+    """
+    Frozen at the current tick, but keeps running in real time while the
+    tick is processed, so slow ticks show up as send lag.
+    """
+
+    def __init__(self, start):
+        self.current = start
+        self.tick_started = time.perf_counter()
+
+    def set(self, dt):
+        self.current = dt
+        self.tick_started = time.perf_counter()
+
+    def now(self):
+        elapsed = time.perf_counter() - self.tick_started
+        return self.current + datetime.timedelta(seconds=elapsed)
+
+
+class FakeTelegram:
+    def __init__(self, accept_rate):
+        self.accept_rate = accept_rate
+        self.sent = 0
+        self.edited = 0
+        self.to_accept = []
+
+    def send_message(self, chat_id, text, reply_markup=None):
+        self.sent += 1
+        return self.sent
+
+    def edit_message_text(self, chat_id, text, message_id, reply_markup=None):
+        self.edited += 1
+
+    def confirmation_request(self, reservation_id, scheduled_for=None):
+        if random.random() < self.accept_rate:
+            self.to_accept.append(reservation_id)
+
+    def accept_pending(self):
+        Reservation.reservations.filter(id__in=self.to_accept).update(
+            confirmation_deadline=None,
+        )
+        self.to_accept = []
+
+
+def run_async_task(func_name, *args):
+    module_name, name = func_name.rsplit('.', 1)
+    return getattr(import_module(module_name), name)(*args)
+
+
+def run_schedule(schedule):
+    args = ast.literal_eval(schedule.args) if schedule.args else ()
+    if not isinstance(args, tuple):
+        args = (args,)
+
+    run_async_task(schedule.func, *args)
+    if schedule.schedule_type == Schedule.ONCE:
+        schedule.delete()
+        return
+
+    step = datetime.timedelta(minutes=schedule.minutes or 1)
+    if schedule.schedule_type == Schedule.DAILY:
+        step = datetime.timedelta(days=1)
+
+    schedule.next_run += step
+    schedule.save()
+
+
+@contextmanager
+def throwaway_database(path):
+    """
+    Points the default connection at a freshly migrated SQLite file and
+    the cache at a private one, so the bot and the cluster keep writing
+    the real database while the benchmark runs.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    name = connection.settings_dict['NAME']
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    caches = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'benchmark-reminders',
+        },
+    }
+    try:
+        with override_settings(CACHES=caches):
+            call_command('migrate', database=DEFAULT_DB_ALIAS,
+                         interactive=False, verbosity=0)
+            yield
+    finally:
+        connection.close()
+        connection.settings_dict['NAME'] = name
+
+
+class Command(BaseCommand):
+    help = ('Simulates reservations against a fake clock and Telegram to benchmark reminders, '
+            'on a throwaway SQLite database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('sizes', nargs='*', type=int,
+                            default=[1000, 10000, 100000])
+        parser.add_argument('--regions', type=int, default=10)
+        parser.add_argument('--days', type=int, default=21,
+                            help='Reservations are spread over this many days')
+        parser.add_argument('--hours', type=int, default=24,
+                            help='Length of the simulated scheduler run')
+        parser.add_argument('--tick', type=int, default=30,
+                            help='Scheduler tick in seconds')
+        parser.add_argument('--accept-rate', type=float, default=0.8)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            random.seed(options['seed'])
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'benchmark.sqlite3')
+                with throwaway_database(path):
+                    report = self.run(size, options)
+
+            self.write_report(size, report)
+
+    def run(self, size, options):
+        start = timezone.now().replace(second=0, microsecond=0)
+        clock = FakeClock(start)
+        telegram = FakeTelegram(options['accept_rate'])
+        send_confirmation_request = tasks.send_confirmation_request
+
+        def confirmation_request(reservation_id, claim=None):
+            send_confirmation_request(reservation_id, claim)
+            telegram.confirmation_request(reservation_id)
+
+        patches = [
+            mock.patch('django.utils.timezone.now', clock.now),
+            mock.patch.object(tasks, 'send_message', telegram.send_message),
+            mock.patch.object(tasks, 'edit_message_text', telegram.edit_message_text),
+            mock.patch.object(tasks, 'async_task', run_async_task),
+            mock.patch.object(tasks, 'send_confirmation_request', confirmation_request),
+            mock.patch.object(signals, 'send_message', telegram.send_message),
+        ]
+        for patch in patches:
+            patch.start()
+
+        try:
+            # Only the schedules of the benchmark reservations are run,
+            # not the sweeper and the other periodic jobs.
+            last_schedule_id = Schedule.objects.aggregate(Max('id'))['id__max'] or 0
+            created_in = self.create_reservations(size, start, options)
+            schedules = Schedule.objects.filter(id__gt=last_schedule_id).count()
+            ticks, lags = self.simulate(clock, telegram, start, last_schedule_id,
+                                        options)
+        finally:
+            for patch in reversed(patches):
+                patch.stop()
+
+        return {
+            'created_in': created_in,
+            'schedules': schedules / size,
+            'ticks': summarize(ticks),
+            'lags': summarize(lags),
+            'sent': telegram.sent,
+            'edited': telegram.edited,
+            'claims': ReminderClaim.claims.filter(
+                reservation__region__name__startswith=REGION_NAME,
+            ).count(),
+        }
+
+    def create_reservations(self, size, start, options):
+        regions = Region.regions.bulk_create(
+            Region(
+                name=f'{REGION_NAME} {index}',
+                address='',
+                timezone='Europe/Moscow',
+                working_time_from=datetime.time(0, 0),
+                working_time_to=datetime.time(23, 59),
+                day_limit=size,
+                period=5,
+            )
+            for index in range(options['regions'])
+        )
+        users = BotUser.objects.bulk_create(
+            BotUser(chat_id=f'benchmark-{size}-{index}')
+            for index in range(max(1, size // 2))
+        )
+
+        started = time.perf_counter()
+        seconds = options['days'] * 24 * 60 * 60
+        for _ in range(size):
+            Reservation.reservations.create(
+                region=random.choice(regions),
+                user=random.choice(users),
+                datetime=start + datetime.timedelta(
+                    seconds=random.randrange(60 * 60, seconds),
+                ),
+            )
+
+        return time.perf_counter() - started
+
+    def simulate(self, clock, telegram, start, last_schedule_id, options):
+        ticks = []
+        lags = []
+        tick = datetime.timedelta(seconds=options['tick'])
+        end = start + datetime.timedelta(hours=options['hours'])
+        now = start
+        while now < end:
+            now += tick
+            clock.set(now)
+            started = time.perf_counter()
+            due = Schedule.objects.exclude(repeats=0).filter(
+                id__gt=last_schedule_id, next_run__lt=now,
+            )
+            for schedule in due:
+                run_schedule(schedule)
+                if schedule.func in REMINDER_FUNCS:
+                    lags.append((clock.now() - schedule.next_run).total_seconds())
+
+            telegram.accept_pending()
+            ticks.append((time.perf_counter() - started) * 1000)
+
+        return ticks, lags
+
+    def write_report(self, size, report):
+        ticks = report['ticks']
+        lags = report['lags']
+        self.stdout.write(f'\n{size} reservations')
+        self.stdout.write(f'  created in {report["created_in"]:.1f}s '
+                          f'({size / report["created_in"]:.0f}/s)')
+        self.stdout.write(f'  schedules per reservation: {report["schedules"]:.2f}')
+        self.stdout.write(f'  scheduler ticks: {ticks["count"]}, '
+                          f'avg {ticks["avg"]:.1f}ms, p95 {ticks["p95"]:.1f}ms, '
+                          f'max {ticks["max"]:.1f}ms')
+        if lags['count']:
+            self.stdout.write(f'  reminders sent: {lags["count"]}, lag '
+                              f'avg {lags["avg"]:.1f}s, p95 {lags["p95"]:.1f}s, '
+                              f'max {lags["max"]:.1f}s')
+        self.stdout.write(f'  messages sent: {report["sent"]}, edited: {report["edited"]}, '
+                          f'reminder claims: {report["claims"]}')
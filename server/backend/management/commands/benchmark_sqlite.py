@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.signals import apply_sqlite_pragmas
+
+ROLLBACK_JOURNAL_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+}
+
+SEED_ROWS = 10000
+
+
+def connect(path, pragmas):
+    # Same 5 second busy timeout Django uses for sqlite3 by default.
+    db = sqlite3.connect(path, timeout=5, isolation_level=None)
+    apply_sqlite_pragmas(db.cursor(), pragmas)
+    return db
+
+
+def create_database(path, pragmas):
+    db = connect(path, pragmas)
+    db.execute('CREATE TABLE reservation ('
+               'id INTEGER PRIMARY KEY, '
+               'user_id INTEGER NOT NULL, '
+               'datetime REAL NOT NULL, '
+               'status INTEGER NOT NULL)')
+    db.execute('CREATE INDEX reservation_datetime ON reservation (datetime)')
+    db.execute('BEGIN')
+    db.executemany(
+        'INSERT INTO reservation (user_id, datetime, status) VALUES (?, ?, 1)',
+        ((index, random.random() * 1000) for index in range(SEED_ROWS)),
+    )
+    db.execute('COMMIT')
+    db.close()
+
+
+def write(db):
+    db.execute('BEGIN')
+    try:
+        db.execute('INSERT INTO reservation (user_id, datetime, status) '
+                   'VALUES (?, ?, 1)', (random.randrange(SEED_ROWS), random.random() * 1000))
+        db.execute('UPDATE reservation SET status = ? WHERE id = ?',
+                   (random.randrange(7), random.randrange(1, SEED_ROWS)))
+        db.execute('COMMIT')
+    except sqlite3.OperationalError:
+        db.execute('ROLLBACK')
+        raise
+
+
+def read(db):
+    start = random.random() * 1000
+    db.execute('SELECT COUNT(*) FROM reservation WHERE datetime BETWEEN ? AND ?',
+               (start, start + 50)).fetchone()
+    db.execute('SELECT * FROM reservation WHERE datetime >= ? '
+               'ORDER BY datetime LIMIT 50', (start,)).fetchall()
+
+
+def worker(path, pragmas, operation, seconds, results):
+    db = connect(path, pragmas)
+    operation = write if operation == 'write' else read
+    done = locked = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            operation(db)
+            done += 1
+        except sqlite3.OperationalError:
+            locked += 1
+
+    db.close()
+    results.put((operation.__name__, done, locked))
+
+
+class Command(BaseCommand):
+    help = 'Compares multi-process SQLite throughput with and without SQLITE_PRAGMAS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=3)
+        parser.add_argument('--readers', type=int, default=3)
+        parser.add_argument('--seconds', type=int, default=10)
+
+    def handle(self, *args, **options):
+        modes = [
+            ('rollback journal', ROLLBACK_JOURNAL_PRAGMAS),
+            ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS),
+        ]
+        for name, pragmas in modes:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'benchmark.sqlite3')
+                create_database(path, pragmas)
+                totals = self.run(path, pragmas, options)
+
+            seconds = options['seconds']
+            self.stdout.write(f'\n{name}: {pragmas}')
+            for operation, (done, locked) in sorted(totals.items()):
+                self.stdout.write(f'  {operation}: {done / seconds:.0f}/s, '
+                                  f'{locked} "database is locked" errors')
+
+    def run(self, path, pragmas, options):
+        results = multiprocessing.Queue()
+        operations = ['write'] * options['writers'] + ['read'] * options['readers']
+        processes = [
+            multiprocessing.Process(
+                target=worker,
+                args=(path, pragmas, operation, options['seconds'], results),
+            )
+            for operation in operations
+        ]
+        for process in processes:
+            process.start()
+
+        totals = {}
+        for _ in processes:
+            operation, done, locked = results.get()
+            total_done, total_locked = totals.get(operation, (0, 0))
+            totals[operation] = (total_done + done, total_locked + locked)
+
+        for process in processes:
+            process.join()
+
+        return totals
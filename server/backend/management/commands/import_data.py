@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.importing import IMPORTERS, read_records
+
+
+class Command(BaseCommand):
+    help = 'Bulk loads regions, users or reservations from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=IMPORTERS)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                            help='Taken from the file extension by default')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        records = read_records(options['path'], options['format'])
+        importer = IMPORTERS[options['kind']]
+        try:
+            result = importer(records, batch_size=options['batch_size'])
+        except OSError as e:
+            raise CommandError(e)
+        except (KeyError, ValueError) as e:
+            raise CommandError(f'Bad record: {e!r}')
+
+        self.stdout.write(', '.join(f'{key}: {value}'
+                                    for key, value in result.items()))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from backend.retention import purge_task_history
+
+
+class Command(BaseCommand):
+    help = 'Deletes django_q task history older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Retention period, TASK_HISTORY_RETENTION_DAYS by default')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Run a full VACUUM and switch SQLite to incremental vacuum')
+
+    def handle(self, *args, **options):
+        result = purge_task_history(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            vacuum=options['vacuum'],
+        )
+        self.stdout.write(f'Deleted {result["tasks"]} tasks, '
+                          f'{result["reminder_claims"]} reminder claims, '
+                          f'{result["conversation_states"]} expired '
+                          f'conversation states')
+        self.stdout.write(f'Reclaimed {result["reclaimed_bytes"] // 1024} KB, '
+                          f'{result["free_bytes"] // 1024} KB left free in '
+                          f'the database file')
@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from backend.metrics import get_queue_metrics
+
+
+def format_seconds(value):
+    if value is None:
+        return '-'
+    return f'{value:.1f}s'
+
+
+class Command(BaseCommand):
+    help = 'Reports django_q queue depth, reminder lag and failure counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=60,
+                            help='Size of the task history window')
+        parser.add_argument('--json', action='store_true',
+                            help='Print the raw metrics as JSON')
+
+    def handle(self, *args, **options):
+        metrics = get_queue_metrics(options['minutes'])
+        if options['json']:
+            self.stdout.write(json.dumps(metrics, indent=2))
+            return
+
+        queue = metrics['queue']
+        self.stdout.write(f'Queue: {queue["queued"]} queued, '
+                          f'{queue["in_progress"]} in progress')
+        self.stdout.write(f'Due schedules: {queue["due_schedules"]}, '
+                          f'oldest {format_seconds(queue["oldest_due_seconds"])}')
+
+        self.stdout.write(f'\nTasks in the last {metrics["window_minutes"]} minutes:')
+        for func, counts in metrics['tasks'].items():
+            self.stdout.write(f'  {func}: {counts["total"]} run, '
+                              f'{counts["failed"]} failed')
+
+        self.stdout.write('\nReminder lag (scheduled -> started):')
+        for func, stats in metrics['reminders'].items():
+            lag = stats['lag']
+            duration = stats['duration']
+            self.stdout.write(
+                f'  {func}: {lag["count"]} runs, '
+                f'avg {format_seconds(lag["avg"])}, '
+                f'p95 {format_seconds(lag["p95"])}, '
+                f'max {format_seconds(lag["max"])}, '
+                f'duration avg {format_seconds(duration["avg"])}'
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from backend.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recounts the per-region reservation rollups from all reservations, archived included'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--region', type=int, action='append',
+                            dest='regions', help='Only this region id, may be repeated')
+
+    def handle(self, *args, **options):
+        total = rebuild_rollups(region_ids=options['regions'])
+        self.stdout.write(f'Counted {total} reservations')
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.routers import replica_configured, sync_sqlite_replica
+
+
+class Command(BaseCommand):
+    help = 'Copies the primary SQLite database into the replica with the backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=None,
+                            help='Keep syncing every N seconds')
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('SQLITE_REPLICA is not set')
+
+        while True:
+            started = time.perf_counter()
+            sync_sqlite_replica()
+            self.stdout.write(f'Replica synced in '
+                              f'{time.perf_counter() - started:.2f}s')
+            if options['every'] is None:
+                return
+
+            time.sleep(options['every'])
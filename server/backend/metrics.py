@@ -0,0 +1,86 @@
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django_q.brokers import get_broker
+from django_q.models import Schedule, Task
+
+REMINDER_FUNCS = (
+    'backend.tasks.confirmation_request',
+    'backend.tasks.request_after_visiting',
+)
+
+
+def percentile(values, rank):
+    if not values:
+        return None
+
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * rank / 100))
+    return values[index]
+
+
+def summarize(values):
+    return {
+        'count': len(values),
+        'avg': sum(values) / len(values) if values else None,
+        'p95': percentile(values, 95),
+        'max': max(values) if values else None,
+    }
+
+
+def get_queue_depth():
+    broker = get_broker()
+    now = timezone.now()
+    due_schedules = Schedule.objects.filter(next_run__lte=now).exclude(repeats=0)
+    oldest_next_run = due_schedules.aggregate(Min('next_run'))['next_run__min']
+    return {
+        'queued': broker.queue_size(),
+        'in_progress': broker.lock_size(),
+        'due_schedules': due_schedules.count(),
+        'oldest_due_seconds': (
+            (now - oldest_next_run).total_seconds() if oldest_next_run else None
+        ),
+    }
+
+
+def get_task_counts(since):
+    rows = Task.objects.filter(stopped__gte=since).values('func').annotate(
+        total=Count('id'),
+        failed=Count('id', filter=Q(success=False)),
+    ).order_by('func')
+    return {row['func']: {'total': row['total'], 'failed': row['failed']}
+            for row in rows}
+
+
+def get_reminder_latency(since):
+    tasks = Task.objects.filter(
+        func__in=REMINDER_FUNCS,
+        started__gte=since,
+    ).only('func', 'args', 'started', 'stopped')
+    lags = {func: [] for func in REMINDER_FUNCS}
+    durations = {func: [] for func in REMINDER_FUNCS}
+    for task in tasks:
+        durations[task.func].append(task.time_taken())
+        if not task.args or len(task.args) < 2:
+            continue
+
+        scheduled_for = parse_datetime(task.args[1])
+        lags[task.func].append((task.started - scheduled_for).total_seconds())
+
+    return {
+        func: {
+            'lag': summarize(lags[func]),
+            'duration': summarize(durations[func]),
+        }
+        for func in REMINDER_FUNCS
+    }
+
+
+def get_queue_metrics(minutes=60):
+    since = timezone.now() - timezone.timedelta(minutes=minutes)
+    return {
+        'window_minutes': minutes,
+        'queue': get_queue_depth(),
+        'tasks': get_task_counts(since),
+        'reminders': get_reminder_latency(since),
+    }
@@ -0,0 +1,46 @@
+from django.conf import settings
+
+from .routers import use_replica
+
+PIN_COOKIE = 'primary_pin'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends reads from read-only admin views, the changelists and reports,
+    to the replica. Change and add forms stay on the primary, a form built
+    from a lagging replica would save stale values back. After a write the
+    rest of the request stays on the primary, and a short-lived cookie
+    keeps the same browser there while the replica catches up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def reads_from_replica(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+
+        if PIN_COOKIE in request.COOKIES:
+            return False
+
+        url_name = request.resolver_match.url_name or ''
+        return url_name.endswith(tuple(settings.REPLICA_READ_VIEWS))
+
+    def __call__(self, request):
+        with use_replica(False) as state:
+            request.routing_state = state
+            response = self.get_response(request)
+
+        if state.wrote:
+            response.set_cookie(PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # The view is only known once the URL is resolved.
+        if not request.routing_state.wrote:
+            request.routing_state.read_replica = self.reads_from_replica(
+                request
+            )
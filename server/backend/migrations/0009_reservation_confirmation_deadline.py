@@ -0,0 +1,64 @@
+# Generated by Django 4.1.13 on 2026-10-19 19:24
+
+import ast
+
+from django.db import migrations, models
+
+SWEEPER_NAME = 'refuse-overdue-confirmations'
+REFUSE_SCHEDULE_PREFIX = 'confirmation-request-refuse-'
+
+
+def move_refuse_schedules_to_deadlines(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Reservation = apps.get_model('backend', 'Reservation')
+    schedules = Schedule.objects.filter(name__startswith=REFUSE_SCHEDULE_PREFIX)
+    for schedule in schedules:
+        reservation_id, message_id = ast.literal_eval(schedule.args)
+        Reservation.objects.filter(id=reservation_id).update(
+            confirmation_deadline=schedule.next_run,
+            confirmation_message_id=message_id,
+        )
+
+    schedules.delete()
+
+
+def create_sweeper_schedule(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.update_or_create(
+        name=SWEEPER_NAME,
+        defaults={
+            'func': 'backend.tasks.refuse_overdue_confirmations',
+            'schedule_type': 'I',
+            'minutes': 1,
+            'repeats': -1,
+        },
+    )
+
+
+def delete_sweeper_schedule(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.filter(name=SWEEPER_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_botuser_from_user'),
+        ('django_q', '0014_schedule_cluster'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='confirmation_deadline',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Срок подтверждения'),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='confirmation_message_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(move_refuse_schedules_to_deadlines,
+                             migrations.RunPython.noop),
+        migrations.RunPython(create_sweeper_schedule, delete_sweeper_schedule),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.13 on 2026-10-19 19:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_reservation_confirmation_deadline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderClaim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.IntegerField(choices=[(1, 'Запрос подтверждения'), (2, 'Опрос после визита')])),
+                ('scheduled_for', models.DateTimeField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_claims', to='backend.reservation')),
+            ],
+            managers=[
+                ('claims', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='reminderclaim',
+            constraint=models.UniqueConstraint(fields=('reservation', 'kind', 'scheduled_for'), name='unique_reminder_claim'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.1.13 on 2026-10-19 20:02
+
+from django.db import migrations
+
+SCHEDULE_NAME = 'purge-task-history'
+
+
+def create_purge_schedule(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.update_or_create(
+        name=SCHEDULE_NAME,
+        defaults={
+            'func': 'backend.retention.purge_task_history',
+            'schedule_type': 'D',
+            'repeats': -1,
+        },
+    )
+
+
+def delete_purge_schedule(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.filter(name=SCHEDULE_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0010_reminderclaim'),
+        ('django_q', '0014_schedule_cluster'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_purge_schedule, delete_purge_schedule),
+    ]
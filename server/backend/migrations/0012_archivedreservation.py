@@ -0,0 +1,95 @@
+# Generated by Django 4.1.13 on 2026-10-19 19:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+import django.utils.timezone
+
+ARCHIVE_SCHEDULE_NAME = 'archive-past-reservations'
+
+
+def create_archive_schedule(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    midnight = django.utils.timezone.now().replace(
+        hour=0, minute=0, second=0, microsecond=0,
+    )
+    Schedule.objects.update_or_create(
+        name=ARCHIVE_SCHEDULE_NAME,
+        defaults={
+            'func': 'backend.retention.archive_past_reservations',
+            'schedule_type': 'D',
+            'repeats': -1,
+            'next_run': midnight + django.utils.timezone.timedelta(days=1),
+        },
+    )
+
+
+def delete_archive_schedule(apps, schema_editor):
+    Schedule = apps.get_model('django_q', 'Schedule')
+    Schedule.objects.filter(name=ARCHIVE_SCHEDULE_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0011_purge_task_history_schedule'),
+        ('django_q', '0014_schedule_cluster'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('datetime', models.DateTimeField(verbose_name='Дата и время')),
+                ('status', models.IntegerField(choices=[(0, 'Отказано'), (1, 'Зарезирвировано'), (2, 'В очереди'), (3, 'На приеме'), (4, 'Не пришел'), (5, 'Все ок'), (6, 'Подтвержден')], verbose_name='Статус')),
+                ('created', models.DateTimeField()),
+                ('updated', models.DateTimeField()),
+                ('archived', models.BooleanField(verbose_name='В архиве')),
+            ],
+            options={
+                'verbose_name': 'История заявок',
+                'verbose_name_plural': 'История заявок',
+                'db_table': 'backend_reservationhistory',
+                'ordering': ['-datetime'],
+                'managed': False,
+            },
+            managers=[
+                ('history', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedReservation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('datetime', models.DateTimeField()),
+                ('status', models.IntegerField(choices=[(0, 'Отказано'), (1, 'Зарезирвировано'), (2, 'В очереди'), (3, 'На приеме'), (4, 'Не пришел'), (5, 'Все ок'), (6, 'Подтвержден')])),
+                ('created', models.DateTimeField()),
+                ('updated', models.DateTimeField()),
+                ('archived', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Архивная заявка',
+                'verbose_name_plural': 'Архивные заявки',
+                'ordering': ['datetime'],
+            },
+            managers=[
+                ('archived_reservations', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['region', 'datetime'], name='backend_res_region__a40c95_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedreservation',
+            name='region',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reservations', to='backend.region'),
+        ),
+        migrations.AddField(
+            model_name='archivedreservation',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reservations', to='backend.botuser'),
+        ),
+        migrations.RunPython(create_archive_schedule, delete_archive_schedule),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.1.13 on 2026-10-19 19:39
+
+from django.db import migrations, models
+import django.db.models.manager
+import django.utils.timezone
+
+
+def move_states_out(apps, schema_editor):
+    BotUser = apps.get_model('backend', 'BotUser')
+    ConversationState = apps.get_model('backend', 'ConversationState')
+    expires = django.utils.timezone.now() + django.utils.timezone.timedelta(
+        minutes=30,
+    )
+    ConversationState.states.bulk_create([
+        ConversationState(
+            chat_id=user.chat_id,
+            state=user.bot_state,
+            date=user.temp_date,
+            expires=expires,
+        )
+        for user in BotUser.objects.exclude(bot_state=0)
+    ])
+
+
+def move_states_back(apps, schema_editor):
+    BotUser = apps.get_model('backend', 'BotUser')
+    ConversationState = apps.get_model('backend', 'ConversationState')
+    for state in ConversationState.states.all():
+        BotUser.objects.filter(chat_id=state.chat_id).update(
+            bot_state=state.state,
+            temp_date=state.date,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0012_archivedreservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.CharField(max_length=255, unique=True)),
+                ('state', models.IntegerField(choices=[(0, 'Nothing'), (1, 'Reservation Time'), (2, 'Input Wokring Time'), (3, 'Input Day Limit'), (4, 'Input Period')], default=0)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('expires', models.DateTimeField(db_index=True)),
+            ],
+            managers=[
+                ('states', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RunPython(move_states_out, move_states_back),
+        migrations.RemoveField(
+            model_name='botuser',
+            name='bot_state',
+        ),
+        migrations.RemoveField(
+            model_name='botuser',
+            name='temp_date',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.1.13 on 2026-10-19 19:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0013_conversationstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('hour', models.PositiveSmallIntegerField(verbose_name='Час')),
+                ('status', models.IntegerField(choices=[(0, 'Отказано'), (1, 'Зарезирвировано'), (2, 'В очереди'), (3, 'На приеме'), (4, 'Не пришел'), (5, 'Все ок'), (6, 'Подтвержден')], verbose_name='Статус')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество')),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='backend.region', verbose_name='Регион')),
+            ],
+            options={
+                'verbose_name': 'Статистика заявок',
+                'verbose_name_plural': 'Статистика заявок',
+                'ordering': ['-date', 'hour', 'status'],
+            },
+            managers=[
+                ('rollups', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='reservationrollup',
+            constraint=models.UniqueConstraint(fields=('region', 'date', 'hour', 'status'), name='unique_reservation_rollup'),
+        ),
+    ]
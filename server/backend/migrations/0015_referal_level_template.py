@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# (id, type, title, body), backend/templates.py refers to them by id.
+TEMPLATES = [
+    (86, 1, 'REFERAL_LEVEL', '<p>Уровень {level}: <strong>{count}</strong></p>'),
+]
+
+
+def create_templates(apps, schema_editor):
+    Template = apps.get_model('backend', 'Template')
+    for id, type, title, body in TEMPLATES:
+        Template._default_manager.get_or_create(
+            id=id, defaults={'type': type, 'title': title, 'body': body},
+        )
+
+
+def delete_templates(apps, schema_editor):
+    Template = apps.get_model('backend', 'Template')
+    Template._default_manager.filter(
+        id__in=[template[0] for template in TEMPLATES],
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_reservationrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_templates, delete_templates),
+    ]
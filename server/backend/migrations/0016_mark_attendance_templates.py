@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# (id, type, title, body), backend/templates.py refers to them by id.
+TEMPLATES = [
+    (87, 2, 'COME_ALL_ON_PAGE', '<p>Пришли: все на странице</p>'),
+    (88, 2, 'NOT_COME_ALL_ON_PAGE', '<p>Не пришли: все на странице</p>'),
+    (89, 2, 'NOT_COME_ALL_REMAINING', '<p>Не пришли: все оставшиеся</p>'),
+    (90, 1, 'NOT_COME_MARKED', '<p>Отмечено неявок: {count}</p>'),
+]
+
+
+def create_templates(apps, schema_editor):
+    Template = apps.get_model('backend', 'Template')
+    for id, type, title, body in TEMPLATES:
+        Template._default_manager.get_or_create(
+            id=id, defaults={'type': type, 'title': title, 'body': body},
+        )
+
+
+def delete_templates(apps, schema_editor):
+    Template = apps.get_model('backend', 'Template')
+    Template._default_manager.filter(
+        id__in=[template[0] for template in TEMPLATES],
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0015_referal_level_template'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_templates, delete_templates),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# (id, type, title, body), backend/templates.py refers to them by id.
+TEMPLATES = [
+    (91, 2, 'REGION_STATS', '<p>Статистика</p>'),
+    (92, 1, 'REGION_STATS', '<p><strong>Статистика ({days} дн.)</strong></p>'),
+    (93, 1, 'REGION_STATS_TOTAL', '<p>Всего заявок: <strong>{total}</strong></p>'),
+    (94, 1, 'REGION_STATS_NO_SHOW_RATE',
+     '<p>Неявки: <strong>{no_show_rate:.0%}</strong></p>'),
+]
+
+
+def create_templates(apps, schema_editor):
+    Template = apps.get_model('backend', 'Template')
+    for id, type, title, body in TEMPLATES:
+        Template._default_manager.get_or_create(
+            id=id, defaults={'type': type, 'title': title, 'body': body},
+        )
+
+
+def delete_templates(apps, schema_editor):
+    Template = apps.get_model('backend', 'Template')
+    Template._default_manager.filter(
+        id__in=[template[0] for template in TEMPLATES],
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0016_mark_attendance_templates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_templates, delete_templates),
+    ]
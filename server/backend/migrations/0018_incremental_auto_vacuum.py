@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def enable_incremental_vacuum(apps, schema_editor):
+    # The mode only changes with a VACUUM, done once here so that the daily
+    # purge-task-history job can hand pages back with incremental_vacuum.
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum')
+        if cursor.fetchone()[0] != 2:
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            cursor.execute('VACUUM')
+
+
+class Migration(migrations.Migration):
+    # VACUUM cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('backend', '0017_region_stats_templates'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_incremental_vacuum,
+                             migrations.RunPython.noop),
+    ]
@@ -1,12 +1,99 @@
+import os
+
 import pytz
-from django.db import models
+from django.db import (connections, models, router, transaction,
+                       DatabaseError, IntegrityError)
+from django.db.models import signals
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
 from django.contrib import admin
 from ckeditor.fields import RichTextField
 from bs4 import BeautifulSoup
 from bs4.element import NavigableString, Tag
 
-
-class Region(models.Model):
+# Referral chains can loop, a user may /start with the link of someone
+# they invited, so the recursive query stops at this depth.
+REFERRAL_MAX_DEPTH = 10
+
+
+class DirtyFieldsMixin:
+    """
+    Remembers the values a row was loaded or saved with, so that save()
+    only writes the changed columns and skips the query when nothing
+    changed. The save signals are sent either way.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_dirty_fields(self):
+        # A field deferred by only() or defer() and assigned afterwards is
+        # dirty too, it is in __dict__ without a loaded value.
+        loaded_values = getattr(self, '_loaded_values', {})
+        return [
+            field.name for field in self._meta.concrete_fields
+            if (field.attname not in loaded_values
+                and field.attname in self.__dict__)
+            or (field.attname in loaded_values
+                and getattr(self, field.attname) != loaded_values[field.attname])
+        ]
+
+    def save(self, *args, **kwargs):
+        partial = (not self._state.adding
+                   and hasattr(self, '_loaded_values')
+                   and not args and kwargs.get('update_fields') is None
+                   and not kwargs.get('force_insert'))
+        if partial:
+            dirty_fields = self.get_dirty_fields()
+            if not dirty_fields:
+                self.send_save_signals(kwargs.get('using'))
+                return
+
+            auto_now_fields = [
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+            ]
+            kwargs['update_fields'] = dirty_fields + auto_now_fields
+
+        try:
+            super().save(*args, **kwargs)
+        except DatabaseError as error:
+            # A bare DatabaseError means the UPDATE matched no row, it was
+            # deleted since it was loaded. A full save inserts it again, as
+            # it did before only the changes were written.
+            if not partial or type(error) is not DatabaseError:
+                raise
+
+            # Raised after an UPDATE that succeeded, the transaction is
+            # fine even though save() has marked it for rollback.
+            using = kwargs.get('using') or router.db_for_write(
+                self.__class__, instance=self,
+            )
+            if transaction.get_connection(using).in_atomic_block:
+                transaction.set_rollback(False, using=using)
+
+            del kwargs['update_fields']
+            super().save(*args, **kwargs)
+
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def send_save_signals(self, using=None):
+        using = using or router.db_for_write(self.__class__, instance=self)
+        signals.pre_save.send(sender=self.__class__, instance=self, raw=False,
+                              using=using, update_fields=None)
+        signals.post_save.send(sender=self.__class__, instance=self,
+                               created=False, update_fields=None, raw=False,
+                               using=using)
+
+
+class Region(DirtyFieldsMixin, models.Model):
     regions = models.Manager()
     name = models.CharField(
         max_length=255,
@@ -28,15 +115,72 @@ class Region(models.Model):
     def __str__(self):
         return self.name
 
-
-class BotUser(models.Model):
-    class State(models.IntegerChoices):
-        NOTHING = 0
-        RESERVATION_TIME = 1
-        INPUT_WOKRING_TIME = 2
-        INPUT_DAY_LIMIT = 3
-        INPUT_PERIOD = 4
-
+    @staticmethod
+    def autocomplete_search_fields():
+        return ('name',)
+
+
+# FTS5 trigram index over the searchable BotUser columns, created by
+# backend.signals after migrating. Trigrams need at least 3 characters.
+BOT_USER_SEARCH_TABLE = 'backend_botuser_search'
+BOT_USER_SEARCH_MIN_LENGTH = 3
+
+
+class BotUserManager(models.Manager):
+    def get_search_filter(self, query):
+        """
+        Matches users whose chat_id, username or name contains the query,
+        looked up in the trigram index. Short queries and databases other
+        than SQLite fall back to a prefix match.
+        """
+        query = query.strip()
+        if (connections[self.db].vendor == 'sqlite'
+                and len(query) >= BOT_USER_SEARCH_MIN_LENGTH):
+            match = '"{}"'.format(query.replace('"', '""'))
+            return models.Q(id__in=RawSQL(
+                f'SELECT rowid FROM {BOT_USER_SEARCH_TABLE} '
+                f'WHERE {BOT_USER_SEARCH_TABLE} MATCH %s',
+                (match,),
+            ))
+
+        return (models.Q(chat_id__startswith=query)
+                | models.Q(username__istartswith=query)
+                | models.Q(first_name__istartswith=query)
+                | models.Q(last_name__istartswith=query))
+
+    def search(self, query):
+        return self.filter(self.get_search_filter(query))
+
+    def get_referral_levels(self, user_id, max_depth=REFERRAL_MAX_DEPTH):
+        """
+        Returns [(level, count), ...] for the user's referral tree, each
+        user counted once at the level closest to the root.
+        """
+        table = self.model._meta.db_table
+        sql = f'''
+            WITH RECURSIVE tree(id, level) AS (
+                SELECT id, 1 FROM {table} WHERE from_user_id = %s
+                UNION
+                SELECT referal.id, tree.level + 1
+                FROM {table} referal
+                JOIN tree ON referal.from_user_id = tree.id
+                WHERE tree.level < %s
+            )
+            SELECT level, COUNT(*) FROM (
+                SELECT id, MIN(level) AS level FROM tree
+                WHERE id != %s
+                GROUP BY id
+            )
+            GROUP BY level
+            ORDER BY level
+        '''
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, [user_id, max_depth, user_id])
+            return cursor.fetchall()
+
+
+class BotUser(DirtyFieldsMixin, models.Model):
+    objects = BotUserManager()
     region = models.ForeignKey(
         verbose_name='Регион',
         to=Region,
@@ -62,8 +206,6 @@ class BotUser(models.Model):
         null=True,
         blank=True,
     )
-    bot_state = models.IntegerField(default=State.NOTHING)
-    temp_date = models.DateField(null=True, blank=True)
     created = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -73,6 +215,55 @@ class BotUser(models.Model):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
 
+    @staticmethod
+    def autocomplete_search_fields():
+        return ('=chat_id', '^username', '^first_name', '^last_name')
+
+    @staticmethod
+    def autocomplete_search(queryset, query):
+        return queryset.filter(BotUser.objects.get_search_filter(query))
+
+
+def get_conversation_state_ttl():
+    return timezone.timedelta(
+        minutes=int(os.getenv('CONVERSATION_STATE_TTL', 30))
+    )
+
+
+class ConversationStateManager(models.Manager):
+    def get_state(self, chat_id):
+        state = self.filter(chat_id=chat_id,
+                            expires__gt=timezone.now()).first()
+        return state or self.model(chat_id=chat_id)
+
+    def set_state(self, chat_id, state, date=None):
+        self.update_or_create(
+            chat_id=chat_id,
+            defaults={
+                'state': state,
+                'date': date,
+                'expires': timezone.now() + get_conversation_state_ttl(),
+            },
+        )
+
+    def clear(self, chat_id):
+        self.filter(chat_id=chat_id).delete()
+
+
+class ConversationState(models.Model):
+    class State(models.IntegerChoices):
+        NOTHING = 0
+        RESERVATION_TIME = 1
+        INPUT_WOKRING_TIME = 2
+        INPUT_DAY_LIMIT = 3
+        INPUT_PERIOD = 4
+
+    states = ConversationStateManager()
+    chat_id = models.CharField(unique=True, max_length=255)
+    state = models.IntegerField(choices=State.choices, default=State.NOTHING)
+    date = models.DateField(null=True, blank=True)
+    expires = models.DateTimeField(db_index=True)
+
 
 class RegionAdmin(models.Model):
     region = models.ForeignKey(
@@ -92,7 +283,7 @@ class ActualManager(models.Manager):
         return super().get_queryset().exclude(status=0)
 
 
-class Reservation(models.Model):
+class Reservation(DirtyFieldsMixin, models.Model):
     class Status(models.IntegerChoices):
         REFUSED = 0, 'Отказано'
         RESERVED = 1, 'Зарезирвировано'
@@ -124,6 +315,13 @@ class Reservation(models.Model):
         choices=Status.choices,
         default=Status.RESERVED,
     )
+    confirmation_deadline = models.DateTimeField(
+        verbose_name='Срок подтверждения',
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    confirmation_message_id = models.BigIntegerField(null=True, blank=True)
 
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
@@ -132,6 +330,183 @@ class Reservation(models.Model):
         verbose_name = 'Заявка'
         verbose_name_plural = 'Заявки'
         ordering = ['datetime']
+        indexes = [
+            models.Index(fields=['region', 'datetime']),
+        ]
+
+    @admin.display(description='Дата и время')
+    def get_datetime(self):
+        tz = pytz.timezone(self.region.timezone)
+        return self.datetime.astimezone(tz).strftime('%d/%m/%Y %H:%M:%S')
+
+
+class ReminderClaimManager(models.Manager):
+    def claim(self, reservation_id, kind, scheduled_for):
+        try:
+            with transaction.atomic():
+                self.create(
+                    reservation_id=reservation_id,
+                    kind=kind,
+                    scheduled_for=scheduled_for,
+                )
+        except IntegrityError:
+            return False
+
+        return True
+
+    def release(self, reservation_id, kind, scheduled_for):
+        self.filter(
+            reservation_id=reservation_id,
+            kind=kind,
+            scheduled_for=scheduled_for,
+        ).delete()
+
+
+class ReminderClaim(models.Model):
+    class Kind(models.IntegerChoices):
+        CONFIRMATION_REQUEST = 1, 'Запрос подтверждения'
+        REQUEST_AFTER_VISITING = 2, 'Опрос после визита'
+
+    claims = ReminderClaimManager()
+    reservation = models.ForeignKey(
+        to=Reservation,
+        on_delete=models.CASCADE,
+        related_name='reminder_claims',
+    )
+    kind = models.IntegerField(choices=Kind.choices)
+    scheduled_for = models.DateTimeField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reservation', 'kind', 'scheduled_for'],
+                name='unique_reminder_claim',
+            ),
+        ]
+
+
+class ReservationRollupManager(models.Manager):
+    def add(self, changes):
+        """
+        Applies {(region_id, date, hour, status): delta, ...} to the
+        counters, creating the missing rows.
+        """
+        for (region_id, date, hour, status), delta in changes.items():
+            if not delta:
+                continue
+
+            bucket = self.filter(region_id=region_id, date=date, hour=hour,
+                                 status=status)
+            if bucket.update(count=models.F('count') + delta):
+                continue
+
+            try:
+                with transaction.atomic():
+                    self.create(region_id=region_id, date=date, hour=hour,
+                                status=status, count=delta)
+            except IntegrityError:
+                bucket.update(count=models.F('count') + delta)
+
+
+class ReservationRollup(models.Model):
+    rollups = ReservationRollupManager()
+    region = models.ForeignKey(
+        verbose_name='Регион',
+        to=Region,
+        on_delete=models.CASCADE,
+        related_name='rollups',
+    )
+    date = models.DateField(verbose_name='Дата')
+    hour = models.PositiveSmallIntegerField(verbose_name='Час')
+    status = models.IntegerField(
+        verbose_name='Статус',
+        choices=Reservation.Status.choices,
+    )
+    count = models.IntegerField(verbose_name='Количество', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика заявок'
+        verbose_name_plural = 'Статистика заявок'
+        ordering = ['-date', 'hour', 'status']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['region', 'date', 'hour', 'status'],
+                name='unique_reservation_rollup',
+            ),
+        ]
+
+
+class ArchivedReservation(models.Model):
+    archived_reservations = models.Manager()
+    id = models.BigIntegerField(primary_key=True)
+    region = models.ForeignKey(
+        to=Region,
+        on_delete=models.CASCADE,
+        related_name='archived_reservations',
+    )
+    user = models.ForeignKey(
+        to=BotUser,
+        on_delete=models.CASCADE,
+        related_name='archived_reservations',
+    )
+    datetime = models.DateTimeField()
+    status = models.IntegerField(choices=Reservation.Status.choices)
+    created = models.DateTimeField()
+    updated = models.DateTimeField()
+    archived = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Архивная заявка'
+        verbose_name_plural = 'Архивные заявки'
+        ordering = ['datetime']
+
+    @classmethod
+    def from_reservation(cls, reservation):
+        return cls(
+            id=reservation.id,
+            region_id=reservation.region_id,
+            user_id=reservation.user_id,
+            datetime=reservation.datetime,
+            status=reservation.status,
+            created=reservation.created,
+            updated=reservation.updated,
+        )
+
+
+class ReservationHistory(models.Model):
+    """
+    Read-only view over hot and archived reservations, for reporting.
+    """
+    history = models.Manager()
+    id = models.BigIntegerField(primary_key=True)
+    region = models.ForeignKey(
+        verbose_name='Регион',
+        to=Region,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+    )
+    user = models.ForeignKey(
+        verbose_name='Пользователь',
+        to=BotUser,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+    )
+    datetime = models.DateTimeField(verbose_name='Дата и время')
+    status = models.IntegerField(
+        verbose_name='Статус',
+        choices=Reservation.Status.choices,
+    )
+    created = models.DateTimeField()
+    updated = models.DateTimeField()
+    archived = models.BooleanField(verbose_name='В архиве')
+
+    class Meta:
+        managed = False
+        db_table = 'backend_reservationhistory'
+        verbose_name = 'История заявок'
+        verbose_name_plural = 'История заявок'
+        ordering = ['-datetime']
 
     @admin.display(description='Дата и время')
     def get_datetime(self):
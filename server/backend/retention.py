@@ -0,0 +1,111 @@
+import os
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django_q.models import Task
+
+from .models import (ArchivedReservation, ConversationState, ReminderClaim,
+                     Reservation)
+
+
+def delete_in_batches(queryset, batch_size):
+    manager = queryset.model._default_manager
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+
+        count, _ = manager.filter(pk__in=pks).delete()
+        deleted += count
+
+
+def get_page_size(cursor):
+    cursor.execute('PRAGMA page_size')
+    return cursor.fetchone()[0]
+
+
+def get_free_bytes():
+    if connection.vendor != 'sqlite':
+        return 0
+
+    with connection.cursor() as cursor:
+        page_size = get_page_size(cursor)
+        cursor.execute('PRAGMA freelist_count')
+        return cursor.fetchone()[0] * page_size
+
+
+def reclaim_space(full=False):
+    """
+    Hands the free pages of the SQLite file back to the file system. The
+    periodic run needs incremental auto_vacuum, which migration 0018 turns
+    on. Returns the bytes given back.
+    """
+    if connection.vendor != 'sqlite':
+        return 0
+
+    free_bytes = get_free_bytes()
+    with connection.cursor() as cursor:
+        if full:
+            # Switching to incremental mode only takes effect after a VACUUM,
+            # later purges then hand pages back without a full rewrite.
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            cursor.execute('VACUUM')
+        else:
+            cursor.execute('PRAGMA auto_vacuum')
+            if cursor.fetchone()[0] != 2:
+                return 0
+
+            # sqlite3 steps the pragma once, which frees a single page.
+            for _ in range(free_bytes // get_page_size(cursor)):
+                cursor.execute('PRAGMA incremental_vacuum')
+
+    return free_bytes - get_free_bytes()
+
+
+def purge_task_history(days=None, batch_size=500, vacuum=False):
+    if days is None:
+        days = int(os.getenv('TASK_HISTORY_RETENTION_DAYS', 30))
+
+    cutoff = timezone.now() - timezone.timedelta(days=days)
+    result = {
+        'tasks': delete_in_batches(
+            Task.objects.filter(stopped__lt=cutoff), batch_size,
+        ),
+        'reminder_claims': delete_in_batches(
+            ReminderClaim.claims.filter(scheduled_for__lt=cutoff), batch_size,
+        ),
+        'conversation_states': delete_in_batches(
+            ConversationState.states.filter(expires__lt=timezone.now()),
+            batch_size,
+        ),
+    }
+    result['reclaimed_bytes'] = reclaim_space(full=vacuum)
+    # Left in the file when auto_vacuum is not incremental.
+    result['free_bytes'] = get_free_bytes()
+    return result
+
+
+def archive_past_reservations(days=None, batch_size=1000):
+    if days is None:
+        days = int(os.getenv('RESERVATION_ARCHIVE_DAYS', 90))
+
+    cutoff = timezone.now() - timezone.timedelta(days=days)
+    archived = 0
+    while True:
+        with transaction.atomic():
+            reservations = list(
+                Reservation.reservations.filter(datetime__lt=cutoff)
+                .order_by('id')[:batch_size]
+            )
+            if not reservations:
+                return archived
+
+            ArchivedReservation.archived_reservations.bulk_create(
+                map(ArchivedReservation.from_reservation, reservations)
+            )
+            Reservation.reservations.filter(
+                id__in=[reservation.id for reservation in reservations]
+            ).delete()
+
+        archived += len(reservations)
@@ -0,0 +1,82 @@
+import contextvars
+import sqlite3
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY_DATABASE = 'default'
+REPLICA_DATABASE = 'replica'
+
+
+class RoutingState:
+    def __init__(self, read_replica):
+        self.read_replica = read_replica
+        self.wrote = False
+
+
+_routing_state = contextvars.ContextVar('routing_state', default=None)
+
+
+def replica_configured():
+    return REPLICA_DATABASE in settings.DATABASES
+
+
+@contextmanager
+def use_replica(read_replica=True):
+    """
+    Lets reads of REPLICA_APPS models inside the block go to the replica
+    until the first write, after which the block stays on the primary.
+    """
+    state = RoutingState(read_replica)
+    token = _routing_state.set(state)
+    try:
+        yield state
+    finally:
+        _routing_state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or not state.read_replica or state.wrote:
+            return PRIMARY_DATABASE
+
+        if not replica_configured():
+            return PRIMARY_DATABASE
+
+        if model._meta.app_label not in settings.REPLICA_APPS:
+            return PRIMARY_DATABASE
+
+        return REPLICA_DATABASE
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.wrote = True
+
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db != REPLICA_DATABASE
+
+
+def connect_sqlite(alias):
+    # The name is taken from the connection, which points at the test
+    # database in tests, an in-memory one given as a URI.
+    return sqlite3.connect(connections[alias].settings_dict['NAME'], uri=True)
+
+
+def sync_sqlite_replica(pages=-1):
+    # Copied in one step: a stepped backup starts over whenever the
+    # primary is written between steps, and may never finish.
+    primary = connect_sqlite(PRIMARY_DATABASE)
+    replica = connect_sqlite(REPLICA_DATABASE)
+    try:
+        primary.backup(replica, pages=pages)
+    finally:
+        replica.close()
+        primary.close()
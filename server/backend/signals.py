@@ -1,15 +1,123 @@
 import os
 
 from django_q.tasks import schedule, Schedule
-from django.db.models.signals import post_save, post_delete
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (pre_save, post_save, post_delete,
+                                      pre_migrate, post_migrate)
 from django.dispatch import receiver
 from django.utils import timezone
 
-from backend.models import Template, Reservation
+from backend import analytics, caching
+from backend.models import (Template, Reservation, ArchivedReservation,
+                            BotUser, Region, RegionAdmin,
+                            BOT_USER_SEARCH_TABLE)
 from backend.templates import Messages
 from backend.utils import send_message
 
 
+def apply_sqlite_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def connection_created_handler(connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor, getattr(settings, 'SQLITE_PRAGMAS', {}))
+
+
+# The view is dropped before migrating and created again afterwards,
+# because SQLite refuses to rebuild a table a view depends on. flush sends
+# post_migrate alone, the view is still there then.
+CREATE_HISTORY_VIEW = '''
+CREATE VIEW IF NOT EXISTS backend_reservationhistory AS
+SELECT id, region_id, user_id, datetime, status, created, updated, 0 AS archived
+FROM backend_reservation
+UNION ALL
+SELECT id, region_id, user_id, datetime, status, created, updated, 1 AS archived
+FROM backend_archivedreservation
+'''
+
+
+# Rebuilding backend_botuser drops its triggers, so they are created again
+# and the index refilled after every migration.
+CREATE_BOT_USER_SEARCH_INDEX = [
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS {BOT_USER_SEARCH_TABLE} USING fts5(
+        chat_id, username, first_name, last_name,
+        content='backend_botuser', content_rowid='id', tokenize='trigram'
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {BOT_USER_SEARCH_TABLE}_insert
+    AFTER INSERT ON backend_botuser BEGIN
+        INSERT INTO {BOT_USER_SEARCH_TABLE}
+            (rowid, chat_id, username, first_name, last_name)
+        VALUES (new.id, new.chat_id, new.username, new.first_name,
+                new.last_name);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {BOT_USER_SEARCH_TABLE}_delete
+    AFTER DELETE ON backend_botuser BEGIN
+        INSERT INTO {BOT_USER_SEARCH_TABLE}
+            ({BOT_USER_SEARCH_TABLE}, rowid, chat_id, username, first_name,
+             last_name)
+        VALUES ('delete', old.id, old.chat_id, old.username, old.first_name,
+                old.last_name);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {BOT_USER_SEARCH_TABLE}_update
+    AFTER UPDATE OF chat_id, username, first_name, last_name
+    ON backend_botuser BEGIN
+        INSERT INTO {BOT_USER_SEARCH_TABLE}
+            ({BOT_USER_SEARCH_TABLE}, rowid, chat_id, username, first_name,
+             last_name)
+        VALUES ('delete', old.id, old.chat_id, old.username, old.first_name,
+                old.last_name);
+        INSERT INTO {BOT_USER_SEARCH_TABLE}
+            (rowid, chat_id, username, first_name, last_name)
+        VALUES (new.id, new.chat_id, new.username, new.first_name,
+                new.last_name);
+    END
+    ''',
+    f"INSERT INTO {BOT_USER_SEARCH_TABLE}({BOT_USER_SEARCH_TABLE}) "
+    f"VALUES ('rebuild')",
+]
+
+
+@receiver(pre_migrate)
+def pre_migrate_handler(sender, using, **kwargs):
+    if sender.label != 'backend':
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.execute('DROP VIEW IF EXISTS backend_reservationhistory')
+
+
+@receiver(post_migrate)
+def post_migrate_handler(sender, using, **kwargs):
+    if sender.label != 'backend':
+        return
+
+    connection = connections[using]
+    tables = connection.introspection.table_names()
+    if not {'backend_reservation', 'backend_archivedreservation'} <= set(tables):
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_HISTORY_VIEW)
+        if connection.vendor == 'sqlite' and 'backend_botuser' in tables:
+            for sql in CREATE_BOT_USER_SEARCH_INDEX:
+                cursor.execute(sql)
+
+
 def get_confirmation_request_time_list(reservation_datetime):
     result = []
     for i in range(1, 10):
@@ -24,29 +132,37 @@ def get_confirmation_request_time_list(reservation_datetime):
     return result
 
 
+def get_reservation_schedules(reservation):
+    """
+    Returns (func, args, name, next_run) of the reminders of a reserved
+    reservation.
+    """
+    result = []
+    dt_list = get_confirmation_request_time_list(reservation.datetime)
+    for index, dt in enumerate(dt_list, 1):
+        func_name = 'backend.tasks.confirmation_request'
+        name = f'confirmation-request-{reservation.id}-{index}'
+        result.append((func_name, (reservation.id, dt.isoformat()), name, dt))
+
+    request_after_visiting_time = os.getenv('REQUEST_AFTER_VISITING_TIME')
+    dt = reservation.datetime + timezone.timedelta(
+        minutes=int(request_after_visiting_time)
+    )
+    func_name = 'backend.tasks.request_after_visiting'
+    name = f'request-after-visiting-{reservation.id}'
+    result.append((func_name, (reservation.id, dt.isoformat()), name, dt))
+    return result
+
+
 @receiver(post_save, sender=Reservation)
 def reservation_post_save_handler(instance, **kwargs):
     if instance.status == Reservation.Status.RESERVED:
-        dt_list = get_confirmation_request_time_list(instance.datetime)
-        for index, dt in enumerate(dt_list, 1):
-            func_name = 'backend.tasks.confirmation_request'
-            name = f'confirmation-request-{instance.id}-{index}'
-            schedule(func_name, instance.id,
+        for func_name, args, name, dt in get_reservation_schedules(instance):
+            schedule(func_name, *args,
                      name=name,
                      schedule_type=Schedule.ONCE,
                      next_run=dt)
 
-        request_after_visiting_time = os.getenv('REQUEST_AFTER_VISITING_TIME')
-        dt = instance.datetime + timezone.timedelta(
-            minutes=int(request_after_visiting_time)
-        )
-        func_name = 'backend.tasks.request_after_visiting'
-        name = f'request-after-visiting-{instance.id}'
-        schedule(func_name, instance.id,
-                 name=name,
-                 next_run=dt,
-                 schedule_type=Schedule.ONCE)
-
     if instance.status == Reservation.Status.REFUSED:
         name = f'confirmation-request-{instance.id}'
         Schedule.objects.filter(name__startswith=name).delete()
@@ -55,6 +171,76 @@ def reservation_post_save_handler(instance, **kwargs):
         send_message(instance.user.chat_id, Messages.RESERVATION_REFUSED)
 
 
+@receiver(post_save, sender=BotUser)
+@receiver(post_delete, sender=BotUser)
+def bot_user_changed_handler(instance, **kwargs):
+    caching.bump_version(caching.user_namespace(instance.chat_id))
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def reservation_changed_handler(instance, **kwargs):
+    caching.bump_version(caching.user_reservations_namespace(instance.user_id))
+    caching.bump_version(
+        caching.region_reservations_namespace(instance.region_id)
+    )
+
+
+ROLLUP_FIELDS = ('region_id', 'datetime', 'status')
+
+
+@receiver(pre_save, sender=Reservation)
+def reservation_rollup_pre_save_handler(instance, **kwargs):
+    # The values the row had before this save, from DirtyFieldsMixin or,
+    # for instances that were not loaded, from the database.
+    loaded_values = getattr(instance, '_loaded_values', {})
+    if all(name in loaded_values for name in ROLLUP_FIELDS):
+        instance._rollup_row = tuple(loaded_values[name]
+                                     for name in ROLLUP_FIELDS)
+    elif instance.pk is not None:
+        instance._rollup_row = Reservation.reservations.filter(
+            pk=instance.pk,
+        ).values_list(*ROLLUP_FIELDS).first()
+    else:
+        instance._rollup_row = None
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_rollup_post_save_handler(instance, created, **kwargs):
+    row = tuple(getattr(instance, name) for name in ROLLUP_FIELDS)
+    old_row = getattr(instance, '_rollup_row', None)
+    if created or old_row is None:
+        analytics.record_created([row])
+    elif old_row != row:
+        analytics.record_deleted([old_row])
+        analytics.record_created([row])
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_rollup_post_delete_handler(instance, **kwargs):
+    # Archived reservations stay in the rollups.
+    if ArchivedReservation.archived_reservations.filter(
+        id=instance.id,
+    ).exists():
+        return
+
+    analytics.record_deleted(
+        [(instance.region_id, instance.datetime, instance.status)]
+    )
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+def region_changed_handler(**kwargs):
+    caching.bump_version(caching.REGIONS)
+
+
+@receiver(post_save, sender=RegionAdmin)
+@receiver(post_delete, sender=RegionAdmin)
+def region_admin_changed_handler(**kwargs):
+    caching.bump_version(caching.REGION_ADMINS)
+
+
 def generate_code():
     code_text = str()
     code_text += 'from backend.models import Template\n'
@@ -79,9 +265,13 @@ def template_post_save_handler(instance, **kwargs):
     with open(template_file, 'w') as file:
         file.write(generate_code())
 
+    caching.bump_version(caching.KEYBOARDS)
+
 
 @receiver(post_delete, sender=Template)
 def template_post_delete_handler(instance, **kwargs):
     template_file = 'backend/templates.py'
     with open(template_file, 'w') as file:
         file.write(generate_code())
+
+    caching.bump_version(caching.KEYBOARDS)
@@ -1,15 +1,22 @@
 import os
+import operator
+from contextlib import contextmanager
+from functools import reduce
 
 import pytz
 from telebot import types
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
-from django_q.tasks import schedule, Schedule
+from django.utils.dateparse import parse_datetime
+from django_q.tasks import async_task, Schedule
 
 from client.call_types import CallTypes
 from client.utils import make_inline_button
 
+from . import analytics, caching
 from .utils import send_message, edit_message_text
-from .models import Reservation
+from .models import Reservation, ReminderClaim
 from .templates import Messages, Keys
 
 
@@ -24,7 +31,45 @@ def get_reservation_info(reservation):
     )
 
 
-def confirmation_request(reservation_id):
+class Claim:
+    def __init__(self, claimed):
+        self.claimed = claimed
+        self.sent = False
+
+
+@contextmanager
+def reminder_claim(reservation_id, kind, scheduled_for):
+    """
+    Yields a Claim, claimed when no other run has sent this reminder. The
+    claim is given back when sending fails before any message went out,
+    after that a retry would send the first messages again.
+    """
+    if scheduled_for is None:
+        yield Claim(True)
+        return
+
+    scheduled_for = parse_datetime(scheduled_for)
+    if not ReminderClaim.claims.claim(reservation_id, kind, scheduled_for):
+        yield Claim(False)
+        return
+
+    claim = Claim(True)
+    try:
+        yield claim
+    except Exception:
+        if not claim.sent:
+            ReminderClaim.claims.release(reservation_id, kind, scheduled_for)
+        raise
+
+
+def confirmation_request(reservation_id, scheduled_for=None):
+    kind = ReminderClaim.Kind.CONFIRMATION_REQUEST
+    with reminder_claim(reservation_id, kind, scheduled_for) as claim:
+        if claim.claimed:
+            send_confirmation_request(reservation_id, claim)
+
+
+def send_confirmation_request(reservation_id, claim=None):
     reservation = Reservation.reservations.get(id=reservation_id)
 
     keyboard = types.InlineKeyboardMarkup()
@@ -46,29 +91,113 @@ def confirmation_request(reservation_id):
     )
     send_message(reservation.user.chat_id, text,
                  reply_markup=keyboard)
+    if claim is not None:
+        claim.sent = True
+
     message_id = send_message(reservation.user.chat_id,
                               get_reservation_info(reservation))
 
-    name = f'confirmation-request-refuse-{reservation_id}'
-    func_name = 'backend.tasks.confirmation_request_refuse'
-    next_run = timezone.now() + timezone.timedelta(minutes=check_time)
-    schedule(func_name, reservation_id, message_id,
-             name=name,
-             next_run=next_run,
-             schedule_type=Schedule.ONCE)
+    deadline = timezone.now() + timezone.timedelta(minutes=check_time)
+    Reservation.reservations.filter(id=reservation_id).update(
+        confirmation_deadline=deadline,
+        confirmation_message_id=message_id,
+    )
 
 
-def confirmation_request_refuse(reservation_id, message_id):
-    reservation = Reservation.reservations.get(id=reservation_id)
-    reservation.status = Reservation.Status.REFUSED
-    reservation.save()
+def delete_reservation_schedules(reservation_ids, after_visiting=True):
+    filter_data = [Q(name__startswith=f'confirmation-request-{reservation_id}-')
+                   for reservation_id in reservation_ids]
+    if after_visiting:
+        names = [f'request-after-visiting-{reservation_id}'
+                 for reservation_id in reservation_ids]
+        filter_data.append(Q(name__in=names))
+
+    Schedule.objects.filter(reduce(operator.or_, filter_data)).delete()
+
+
+def mark_attendance(queryset, status):
+    """
+    Sets the admin's came / did-not-come mark on every reservation of the
+    queryset with one UPDATE. Pending confirmation requests are dropped,
+    and so is the after-visit survey when the user did not come.
+    """
+    with transaction.atomic():
+        reservations = list(queryset.values_list('id', 'user_id', 'region_id',
+                                                 'datetime', 'status'))
+        if not reservations:
+            return 0
+
+        reservation_ids = [reservation[0] for reservation in reservations]
+        Reservation.reservations.filter(id__in=reservation_ids).update(
+            status=status,
+            confirmation_deadline=None,
+            updated=timezone.now(),
+        )
+        after_visiting = status == Reservation.Status.DID_NOT_COME
+        delete_reservation_schedules(reservation_ids, after_visiting)
+        analytics.record_status_change(
+            [reservation[2:] for reservation in reservations], status,
+        )
+
+    caching.bump_reservation_versions(
+        [reservation[1] for reservation in reservations],
+        [reservation[2] for reservation in reservations],
+    )
+    return len(reservations)
+
+
+def refuse_overdue_confirmations():
+    now = timezone.now()
+    with transaction.atomic():
+        overdue = Reservation.reservations.filter(
+            confirmation_deadline__lte=now,
+        ).exclude(status=Reservation.Status.REFUSED)
+        rows = list(overdue.values_list('id', 'user_id', 'region_id',
+                                        'datetime', 'status'))
+        if not rows:
+            return 0
+
+        reservation_ids = [row[0] for row in rows]
+        Reservation.reservations.filter(id__in=reservation_ids).update(
+            status=Reservation.Status.REFUSED,
+            confirmation_deadline=None,
+            updated=now,
+        )
+        delete_reservation_schedules(reservation_ids)
+        analytics.record_status_change([row[2:] for row in rows],
+                                       Reservation.Status.REFUSED)
+
+    caching.bump_reservation_versions([row[1] for row in rows],
+                                      [row[2] for row in rows])
+
+    func_name = 'backend.tasks.confirmation_refused_notification'
+    for reservation_id in reservation_ids:
+        async_task(func_name, reservation_id)
+
+    return len(reservation_ids)
+
+
+def confirmation_refused_notification(reservation_id):
+    reservation = Reservation.reservations.select_related(
+        'user', 'region',
+    ).get(id=reservation_id)
+    chat_id = reservation.user.chat_id
+    if reservation.confirmation_message_id:
+        edit_message_text(chat_id,
+                          get_reservation_info(reservation),
+                          reservation.confirmation_message_id)
+
+    send_message(chat_id, Messages.RESERVATION_REFUSED)
+
 
-    edit_message_text(reservation.user.chat_id,
-                      get_reservation_info(reservation),
-                      message_id)
+def request_after_visiting(reservation_id, scheduled_for=None):
+    kind = ReminderClaim.Kind.REQUEST_AFTER_VISITING
+    with reminder_claim(reservation_id, kind, scheduled_for) as claim:
+        if claim.claimed:
+            send_request_after_visiting(reservation_id)
 
 
-def request_after_visiting(reservation_id):
+def send_request_after_visiting(reservation_id):
     reservation = Reservation.reservations.get(id=reservation_id)
     keyboard = types.InlineKeyboardMarkup()
     ok_button = make_inline_button(
@@ -34,6 +34,11 @@ class Messages():
     MENU = Template.messages.get(id=78).gettext()
     REFERAL_PROGRAM = Template.messages.get(id=80).gettext()
     REGION_RESERVATION_INFO = Template.messages.get(id=81).gettext()
+    REFERAL_LEVEL = Template.messages.get(id=86).gettext()
+    NOT_COME_MARKED = Template.messages.get(id=90).gettext()
+    REGION_STATS = Template.messages.get(id=92).gettext()
+    REGION_STATS_TOTAL = Template.messages.get(id=93).gettext()
+    REGION_STATS_NO_SHOW_RATE = Template.messages.get(id=94).gettext()
 
 
 class Keys():
@@ -67,6 +72,10 @@ class Keys():
     REFERAL_PROGRAM = Template.keys.get(id=79).gettext()
     COME = Template.keys.get(id=82).gettext()
     NOT_COME = Template.keys.get(id=83).gettext()
+    COME_ALL_ON_PAGE = Template.keys.get(id=87).gettext()
+    NOT_COME_ALL_ON_PAGE = Template.keys.get(id=88).gettext()
+    NOT_COME_ALL_REMAINING = Template.keys.get(id=89).gettext()
+    REGION_STATS = Template.keys.get(id=91).gettext()
 
 
 class Smiles():
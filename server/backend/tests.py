@@ -1,3 +1,429 @@
-from django.test import TestCase
+import datetime
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import pytz
+from django.contrib.auth.models import User
+from django.core.management.sql import emit_post_migrate_signal
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models.signals import post_save
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_q.models import Schedule
+
+from .analytics import get_region_report
+from .importing import import_reservations, import_users
+from .middleware import PIN_COOKIE
+from .models import (BOT_USER_SEARCH_TABLE, ArchivedReservation, BotUser,
+                     ConversationState, Region, Reservation,
+                     ReservationHistory, ReservationRollup)
+from .retention import archive_past_reservations, purge_task_history
+from .routers import REPLICA_DATABASE, sync_sqlite_replica, use_replica
+from .tasks import mark_attendance
+
+
+def create_region(**kwargs):
+    values = {
+        'name': 'Region',
+        'address': 'Address',
+        'timezone': 'Asia/Tashkent',
+        'working_time_from': datetime.time(9),
+        'working_time_to': datetime.time(18),
+        'day_limit': 10,
+        'period': 15,
+    }
+    values.update(kwargs)
+    return Region.regions.create(**values)
+
+
+class DirtyFieldsMixinTestCase(TestCase):
+    def setUp(self):
+        self.region = create_region()
+        self.saves = []
+        post_save.connect(self.post_save_handler, sender=Region)
+
+    def tearDown(self):
+        post_save.disconnect(self.post_save_handler, sender=Region)
+
+    def post_save_handler(self, instance, created, update_fields, **kwargs):
+        self.saves.append((created, update_fields))
+
+    def test_unchanged_save_sends_signals_without_query(self):
+        region = Region.regions.get(id=self.region.id)
+        with CaptureQueriesContext(connection) as queries:
+            region.save()
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(self.saves, [(False, None)])
+
+    def test_save_writes_changed_fields(self):
+        region = Region.regions.get(id=self.region.id)
+        region.day_limit = 20
+        region.save()
+
+        self.assertEqual(self.saves, [(False, frozenset({'day_limit'}))])
+        self.assertEqual(Region.regions.get(id=region.id).day_limit, 20)
+        self.assertEqual(region.get_dirty_fields(), [])
+
+    def test_new_instance_saves_every_field(self):
+        region = Region(id=self.region.id, name='Renamed',
+                        address=self.region.address,
+                        timezone=self.region.timezone,
+                        working_time_from=self.region.working_time_from,
+                        working_time_to=self.region.working_time_to,
+                        day_limit=1, period=1)
+        region.save()
+
+        self.assertEqual(self.saves, [(False, None)])
+        self.assertEqual(Region.regions.get(id=region.id).name, 'Renamed')
+
+    def test_save_of_deleted_row_inserts_it(self):
+        region = Region.regions.get(id=self.region.id)
+        Region.regions.filter(id=region.id).delete()
+        region.day_limit = 20
+        with transaction.atomic():
+            region.save()
+
+        self.assertEqual(Region.regions.get(id=region.id).day_limit, 20)
+        self.assertEqual(self.saves, [(True, None)])
+
+    def test_explicit_update_fields_are_kept(self):
+        user = BotUser.objects.create(chat_id='1', username='old')
+        user = BotUser.objects.get(id=user.id)
+        user.username = 'new'
+        user.first_name = 'First'
+        user.save(update_fields=['first_name'])
+
+        user = BotUser.objects.get(id=user.id)
+        self.assertEqual((user.username, user.first_name), ('old', 'First'))
+
+    def test_assigned_deferred_field_is_saved(self):
+        region = Region.regions.only('id', 'name').get(id=self.region.id)
+        region.day_limit = 20
+        region.save()
+
+        self.assertEqual(self.saves, [(False, frozenset({'day_limit'}))])
+        self.assertEqual(Region.regions.get(id=region.id).day_limit, 20)
+        self.assertEqual(region.get_dirty_fields(), [])
+
+
+class ReservationRollupTestCase(TestCase):
+    def setUp(self):
+        self.region = create_region(timezone='Pacific/Pago_Pago')
+        self.user = BotUser.objects.create(chat_id='1')
+        # 05:30 UTC is 18:30 of the day before in Pago Pago.
+        self.datetime = datetime.datetime(2030, 1, 10, 5, 30, tzinfo=pytz.utc)
+
+    def get_counts(self):
+        return {
+            (rollup.date, rollup.hour, rollup.status): rollup.count
+            for rollup in ReservationRollup.rollups.filter(
+                region=self.region,
+            ).exclude(count=0)
+        }
+
+    def create_reservation(self):
+        return Reservation.reservations.create(region=self.region,
+                                               user=self.user,
+                                               datetime=self.datetime)
+
+    def test_created_in_local_bucket(self):
+        self.create_reservation()
+
+        self.assertEqual(self.get_counts(), {
+            (datetime.date(2030, 1, 9), 18, Reservation.Status.RESERVED): 1,
+        })
+
+    def test_status_change(self):
+        reservation = Reservation.reservations.get(
+            id=self.create_reservation().id,
+        )
+        reservation.status = Reservation.Status.OK
+        reservation.save()
+
+        self.assertEqual(self.get_counts(), {
+            (datetime.date(2030, 1, 9), 18, Reservation.Status.OK): 1,
+        })
+
+    def test_status_change_of_unloaded_instance(self):
+        reservation = self.create_reservation()
+        Reservation(id=reservation.id, region=self.region, user=self.user,
+                    datetime=self.datetime, created=reservation.created,
+                    status=Reservation.Status.CONFIRMED).save()
+
+        self.assertEqual(self.get_counts(), {
+            (datetime.date(2030, 1, 9), 18, Reservation.Status.CONFIRMED): 1,
+        })
+
+    def test_delete(self):
+        self.create_reservation().delete()
+
+        self.assertEqual(self.get_counts(), {})
+
+    def test_mark_attendance(self):
+        reservation = self.create_reservation()
+        mark_attendance(Reservation.reservations.filter(id=reservation.id),
+                        Reservation.Status.DID_NOT_COME)
+
+        self.assertEqual(self.get_counts(), {
+            (datetime.date(2030, 1, 9), 18,
+             Reservation.Status.DID_NOT_COME): 1,
+        })
+
+    def test_report_uses_local_date(self):
+        reservation = self.create_reservation()
+        mark_attendance(Reservation.reservations.filter(id=reservation.id),
+                        Reservation.Status.DID_NOT_COME)
+
+        with mock.patch.object(timezone, 'now', return_value=self.datetime):
+            report = get_region_report(self.region.id, days=0)
+
+        self.assertEqual(report['total'], 1)
+        self.assertEqual(report['by_hour'], [(18, 1)])
+        self.assertEqual(report['no_show_rate'], 1)
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.region = create_region()
+        self.user = BotUser.objects.create(chat_id='1', username='user')
+        for status in (Reservation.Status.RESERVED, Reservation.Status.OK):
+            Reservation.reservations.create(
+                region=self.region, user=self.user, status=status,
+                datetime=datetime.datetime(2030, 1, 10, 5, 30,
+                                           tzinfo=pytz.utc),
+            )
+
+    def test_export_filtered_changelist(self):
+        self.client.force_login(User.objects.create_superuser('admin'))
+        response = self.client.get('/admin/backend/reservation/export/csv/',
+                                   {'status__exact': Reservation.Status.OK})
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1].split(',')[2:5],
+                         ['1', 'user', '2030-01-10 10:30'])
+
+    def test_export_without_view_permission(self):
+        self.client.force_login(
+            User.objects.create_user('staff', is_staff=True),
+        )
+        response = self.client.get('/admin/backend/reservation/export/csv/')
+
+        self.assertEqual(response.status_code, 403)
+
+
+class ImportTestCase(TestCase):
+    def setUp(self):
+        self.region = create_region(name='Region')
+        self.user = BotUser.objects.create(chat_id='1')
+
+    def get_records(self, *datetimes):
+        return [{'user': '1', 'region': 'Region', 'datetime': value}
+                for value in datetimes]
+
+    def test_reservations_imported_once(self):
+        records = self.get_records('2099-01-10 10:00', '2099-01-10 10:00',
+                                   '2099-01-10 11:00')
+        first = import_reservations(records, batch_size=2)
+        schedules = Schedule.objects.count()
+        second = import_reservations(records, batch_size=2)
+
+        self.assertEqual((first['reservations'], first['duplicates']), (2, 1))
+        self.assertEqual((second['reservations'], second['duplicates']), (0, 3))
+        self.assertEqual(Reservation.reservations.count(), 2)
+        self.assertEqual(Schedule.objects.count(), schedules)
+        self.assertEqual(sum(ReservationRollup.rollups.values_list(
+            'count', flat=True,
+        )), 2)
+
+    def test_empty_datetime_names_record(self):
+        records = self.get_records('2099-01-10 10:00', '')
+
+        with self.assertRaisesMessage(ValueError, 'record 2'):
+            import_reservations(records)
+
+    def test_invalid_datetime_names_record(self):
+        with self.assertRaisesMessage(ValueError, 'record 1'):
+            import_reservations(self.get_records('tomorrow'))
+
+    def test_referrer_linked_to_created_users_only(self):
+        import_users([
+            {'chat_id': '1', 'from_user': '3'},
+            {'chat_id': '2', 'from_user': '3'},
+            {'chat_id': '3'},
+        ])
+
+        self.assertIsNone(BotUser.objects.get(chat_id='1').from_user)
+        self.assertEqual(BotUser.objects.get(chat_id='2').from_user.chat_id,
+                         '3')
+
+
+class PurgeTaskHistoryTestCase(TestCase):
+    def test_space_reclaimed(self):
+        expires = timezone.now() - datetime.timedelta(days=1)
+        ConversationState.states.bulk_create(
+            ConversationState(chat_id=f'{index}'.rjust(200, '0'),
+                              expires=expires)
+            for index in range(2000)
+        )
+
+        result = purge_task_history(batch_size=1000)
+
+        self.assertEqual(result['conversation_states'], 2000)
+        self.assertGreater(result['reclaimed_bytes'], 0)
+        self.assertEqual(result['free_bytes'], 0)
+
+
+class ReplicaRoutingTestCase(TransactionTestCase):
+    """
+    Runs against a replica SQLite file, copied from the test database by
+    sync_sqlite_replica. The alias is added once the test runner has set
+    up the databases.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        replica = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory.name, 'replica.sqlite3'),
+        }
+        cls.patches = [
+            mock.patch.dict(settings.DATABASES, {REPLICA_DATABASE: replica}),
+            mock.patch.dict(connections.settings, connections.configure_settings(
+                {'default': connections.settings['default'],
+                 REPLICA_DATABASE: replica},
+            )),
+        ]
+        for patch in cls.patches:
+            patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA_DATABASE].close()
+        del connections[REPLICA_DATABASE]
+        for patch in reversed(cls.patches):
+            patch.stop()
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        sync_sqlite_replica()
+        self.region = create_region(name='Primary only')
+        self.client.force_login(User.objects.create_superuser('admin'))
+
+    def test_sync_copies_rows(self):
+        with use_replica():
+            self.assertFalse(Region.regions.filter(id=self.region.id).exists())
+
+        sync_sqlite_replica()
+        with use_replica():
+            self.assertTrue(Region.regions.filter(id=self.region.id).exists())
+
+    def test_changelist_reads_replica(self):
+        response = self.client.get('/admin/backend/region/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Primary only')
+
+    def test_change_form_reads_primary(self):
+        response = self.client.get(
+            f'/admin/backend/region/{self.region.id}/change/',
+        )
+
+        self.assertContains(response, 'Primary only')
+
+    def test_write_pins_primary(self):
+        with use_replica():
+            self.assertEqual(Region.regions.count(), 0)
+            create_region(name='Written')
+            self.assertEqual(Region.regions.count(), 2)
+
+        response = self.client.post(
+            f'/admin/backend/region/{self.region.id}/delete/', {'post': 'yes'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        response = self.client.get('/admin/backend/region/')
+        self.assertContains(response, 'Written')
+
+
+class BotUserSearchTestCase(TestCase):
+    def setUp(self):
+        self.user = BotUser.objects.create(chat_id='100', username='johndoe',
+                                           first_name='John')
+        BotUser.objects.create(chat_id='200', username='bjorn')
+
+    def search(self, query):
+        return list(BotUser.objects.search(query).values_list('chat_id',
+                                                               flat=True))
+
+    def test_username_contains(self):
+        self.assertEqual(self.search('HNDO'), ['100'])
+
+    def test_short_query_matches_prefix(self):
+        self.assertEqual(self.search('jo'), ['100'])
+        self.assertEqual(self.search('bj'), ['200'])
+
+    def test_index_follows_update(self):
+        self.user.username = 'alice'
+        self.user.save()
+
+        self.assertEqual(self.search('johndoe'), [])
+        self.assertEqual(self.search('lic'), ['100'])
+
+    def test_index_follows_delete(self):
+        self.user.delete()
+
+        self.assertEqual(self.search('john'), [])
+
+    def test_triggers_created_after_migrate(self):
+        with connection.cursor() as cursor:
+            for action in ('insert', 'update', 'delete'):
+                cursor.execute(f'DROP TRIGGER {BOT_USER_SEARCH_TABLE}_{action}')
+
+        BotUser.objects.create(chat_id='300', username='carolyn')
+        emit_post_migrate_signal(verbosity=0, interactive=False,
+                                 db=connection.alias)
+        BotUser.objects.create(chat_id='400', username='carolina')
+
+        self.assertEqual(sorted(self.search('carol')), ['300', '400'])
+
+
+class ArchivePastReservationsTestCase(TestCase):
+    def setUp(self):
+        region = create_region()
+        user = BotUser.objects.create(chat_id='1')
+        now = timezone.now()
+        self.old, self.new = [
+            Reservation.reservations.create(region=region, user=user,
+                                            datetime=dt)
+            for dt in (now - datetime.timedelta(days=100),
+                       now + datetime.timedelta(days=1))
+        ]
+
+    def get_rollup_total(self):
+        return sum(ReservationRollup.rollups.values_list('count', flat=True))
+
+    def test_archives_past_reservations(self):
+        self.assertEqual(self.get_rollup_total(), 2)
+        self.assertEqual(archive_past_reservations(days=90, batch_size=1), 1)
+
+        self.assertEqual(list(Reservation.reservations.values_list(
+            'id', flat=True,
+        )), [self.new.id])
+        self.assertEqual(list(ArchivedReservation.archived_reservations
+                              .values_list('id', flat=True)), [self.old.id])
+        self.assertEqual(self.get_rollup_total(), 2)
+        self.assertEqual(
+            list(ReservationHistory.history.order_by('datetime')
+                 .values_list('id', 'archived')),
+            [(self.old.id, True), (self.new.id, False)],
+        )
@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 
@@ -45,6 +46,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -78,6 +80,66 @@ DATABASES = {
     }
 }
 
+# Optional read replica for admin changelists and reporting, a copy of
+# the primary file refreshed with `manage.py sync_replica`.
+if os.getenv('SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.getenv('SQLITE_REPLICA'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['backend.routers.PrimaryReplicaRouter']
+REPLICA_APPS = ['backend']
+# Admin views whose URL name ends with one of these read from the replica.
+REPLICA_READ_VIEWS = ['_changelist', '_export']
+REPLICA_PIN_SECONDS = 30
+
+# Applied to every new SQLite connection by backend.signals, the bot,
+# the admin server and the django_q cluster all write the same file.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,
+}
+
+
+# Cache shared by the bot, the admin server and the django_q cluster.
+# They run as separate processes and invalidate each other's entries, so
+# the default is a file cache. `locmem` is private to one process and
+# only fits running everything in a single one, e.g. in tests.
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+CACHE_TIMEOUT = int(os.getenv('CACHE_TIMEOUT', 300))
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379'),
+            'KEY_PREFIX': 'accountingbot',
+            'TIMEOUT': CACHE_TIMEOUT,
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / os.getenv('CACHE_LOCATION', 'cache'),
+            'TIMEOUT': CACHE_TIMEOUT,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'accountingbot',
+            'TIMEOUT': CACHE_TIMEOUT,
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -123,3 +185,19 @@ STATIC_URL = '/static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 JET_SIDE_MENU_COMPACT = True
+
+
+# Task queue
+# https://django-q.readthedocs.io/en/latest/configure.html
+
+Q_CLUSTER = {
+    'name': 'AccountingBot',
+    'orm': 'default',
+    'workers': int(os.getenv('Q_CLUSTER_WORKERS', 2)),
+    'timeout': 60,
+    'retry': 90,
+    'bulk': 5,
+    'queue_limit': 20,
+    'poll': 1,
+    'save_limit': 1000,
+}
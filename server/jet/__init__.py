@@ -1 +1,6 @@
+import django
+
 VERSION = '1.0.8'
+
+if django.VERSION < (3, 2):
+    default_app_config = 'jet.apps.JetConfig'
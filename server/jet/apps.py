@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class JetConfig(AppConfig):
+    name = 'jet'
+
+    def ready(self):
+        from jet.signals import connect_signals
+        connect_signals()
@@ -0,0 +1,97 @@
+import datetime
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+from jet.dashboard import settings
+
+
+class Flight(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None, None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def get_cache_key(provider, credential, counter, period, group=None):
+    """
+    The credential is part of the hashed key, so a revoked or another account's credential does not
+    read the responses fetched with this one. The requested dates only move once a day.
+    """
+    key = repr((provider, credential, counter, period, group, datetime.date.today().isoformat()))
+    return 'jet:analytics:%s' % hashlib.md5(key.encode()).hexdigest()
+
+
+def fetch_shared(key, fetch):
+    """
+    Calls fetch while holding a cache lock, so processes sharing the cache wait for the one already
+    requesting the API instead of requesting it again.
+    """
+    lock_key = '%s:lock' % key
+    deadline = time.time() + settings.JET_ANALYTICS_LOCK_TIMEOUT
+    locked = cache.add(lock_key, True, settings.JET_ANALYTICS_LOCK_TIMEOUT)
+
+    while not locked and time.time() < deadline:
+        time.sleep(settings.JET_ANALYTICS_LOCK_POLL_INTERVAL)
+        result = cache.get(key)
+
+        if result is not None:
+            return result, None
+
+        locked = cache.add(lock_key, True, settings.JET_ANALYTICS_LOCK_TIMEOUT)
+
+    try:
+        result, exception = fetch()
+
+        if exception is None and result is not None:
+            cache.set(key, result, settings.JET_ANALYTICS_CACHE_TIMEOUT)
+
+        return result, exception
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def get_response(key, fetch):
+    """
+    Returns (result, exception) of fetch, a client API call, from the cache. Concurrent misses of the
+    same key share one call: threads of a process wait for its result, failed ones included, and other
+    processes for the cached result. Exceptions raised by fetch are returned as well.
+    """
+    if not settings.JET_ANALYTICS_CACHE_TIMEOUT:
+        try:
+            return fetch()
+        except Exception as e:
+            return None, e
+
+    result = cache.get(key)
+
+    if result is not None:
+        return result, None
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+
+        if leader:
+            flight = _flights[key] = Flight()
+
+    if not leader:
+        if not flight.done.wait(settings.JET_ANALYTICS_LOCK_TIMEOUT):
+            return None, RuntimeError('API request timed out')
+        return flight.response
+
+    try:
+        flight.response = fetch_shared(key, fetch)
+    except Exception as e:
+        flight.response = None, e
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+    return flight.response
@@ -1,11 +1,17 @@
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from importlib import import_module
 try:
     from django.core.urlresolvers import reverse
 except ImportError: # Django 1.11
     from django.urls import reverse
 
+from django.db import connections
 from django.template.loader import render_to_string
-from jet.dashboard import modules
+from django.utils import translation
+from jet.dashboard import modules, settings as dashboard_settings
 from jet.dashboard.models import UserDashboardModule
 from django.utils.translation import ugettext_lazy as _
 from jet.ordered_set import OrderedSet
@@ -17,6 +23,89 @@ except ImportError:
     from django.core.context_processors import csrf
 
 
+executor = None
+executor_lock = threading.Lock()
+
+# renders still running on the pool by module cache key, so that the AJAX load of a timed out widget
+# waits for them instead of rendering it again
+pending_renders = {}
+pending_renders_lock = threading.Lock()
+
+
+def get_executor():
+    global executor
+
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=dashboard_settings.JET_DASHBOARD_RENDER_THREADS,
+                thread_name_prefix='jet-dashboard'
+            )
+
+    return executor
+
+
+def render_module(module, language):
+    translation.activate(language)
+
+    try:
+        module.render()
+        return module
+    finally:
+        translation.deactivate()
+        # connections are per thread, the ones opened by this worker are not reused by requests
+        connections.close_all()
+
+
+def copy_module(module):
+    """
+    Returns the copy of the module a worker renders. The worker may keep running after the page is
+    rendered, so init_with_context must not change the module the dashboard template uses.
+    """
+    module_copy = copy.copy(module)
+    module_copy.children = list(module.children)
+    return module_copy
+
+
+def submit_render(module, language):
+    key = module.get_cache_key()
+
+    if key is None:
+        return get_executor().submit(render_module, copy_module(module), language)
+
+    with pending_renders_lock:
+        future = pending_renders.get(key)
+
+        if future is None:
+            future = pending_renders[key] = get_executor().submit(render_module, copy_module(module), language)
+
+    def remove(future):
+        with pending_renders_lock:
+            if pending_renders.get(key) is future:
+                del pending_renders[key]
+
+    future.add_done_callback(remove)
+    return future
+
+
+def wait_for_render(module):
+    """
+    Waits for the render of the module still running on the pool, if any, so that it fills the cache.
+    """
+    key = module.get_cache_key()
+
+    with pending_renders_lock:
+        future = pending_renders.get(key) if key else None
+
+    if future is None:
+        return
+
+    try:
+        future.result(timeout=dashboard_settings.JET_DASHBOARD_RENDER_WAIT_TIMEOUT)
+    except Exception:
+        pass
+
+
 class Dashboard(object):
     """
     Base dashboard class. All custom dashboards should inherit it.
@@ -150,7 +239,40 @@ class Dashboard(object):
 
         self.modules = loaded_modules
 
+    def render_modules(self):
+        """
+        Renders the widgets missing from the cache on a thread pool before the dashboard template uses them.
+        A widget still rendering after its ``render_timeout`` is loaded with AJAX instead.
+        """
+        modules = [
+            module for module in self.modules
+            if not module.ajax_load and module.rendered is None and not module.load_cached()
+        ]
+
+        if dashboard_settings.JET_DASHBOARD_RENDER_THREADS <= 1 or len(modules) <= 1:
+            return
+
+        language = translation.get_language()
+        started = time.monotonic()
+        futures = [(module, submit_render(module, language)) for module in modules]
+
+        for module, future in futures:
+            timeout = max(0, started + module.get_render_timeout() - time.monotonic())
+
+            try:
+                rendered_module = future.result(timeout=timeout)
+            except TimeoutError:
+                module.ajax_load = True
+            except Exception:
+                # rendered again with the page, so that the error is raised as before
+                pass
+            else:
+                for name in module.cached_attributes:
+                    setattr(module, name, getattr(rendered_module, name))
+                module.rendered = rendered_module.rendered
+
     def render(self):
+        self.render_modules()
         context = context_to_dict(self.context)
         context.update({
             'columns': range(self.columns),
@@ -14,6 +14,7 @@ from django.utils.safestring import mark_safe
 from django.utils.text import capfirst
 from googleapiclient.discovery import build
 import httplib2
+from jet.dashboard import analytics
 from jet.dashboard.modules import DashboardModule
 from oauth2client.client import flow_from_clientsecrets, OAuth2Credentials, AccessTokenRefreshError, Storage
 from django.utils.translation import ugettext_lazy as _
@@ -293,9 +294,13 @@ class GoogleAnalyticsBase(DashboardModule):
             date1 = datetime.datetime.now() - datetime.timedelta(days=self.period)
             date2 = datetime.datetime.now()
 
-            try:
+            def fetch():
                 client = GoogleAnalyticsClient(self.storage)
-                result, exception = client.api_ga(self.counter, date1, date2, group)
+                return client.api_ga(self.counter, date1, date2, group)
+
+            try:
+                key = analytics.get_cache_key('google_analytics', self.credential, self.counter, self.period, group)
+                result, exception = analytics.get_response(key, fetch)
 
                 if exception is not None:
                         raise exception
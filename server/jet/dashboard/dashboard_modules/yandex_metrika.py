@@ -12,6 +12,7 @@ from django.utils import formats
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.utils.text import capfirst
+from jet.dashboard import analytics
 from jet.dashboard.modules import DashboardModule
 from django.utils.translation import ugettext_lazy as _
 from django.conf import settings
@@ -233,8 +234,12 @@ class YandexMetrikaBase(DashboardModule):
             date1 = datetime.datetime.now() - datetime.timedelta(days=self.period)
             date2 = datetime.datetime.now()
 
-            client = YandexMetrikaClient(self.access_token)
-            result, exception = client.api_stat_traffic_summary(self.counter, date1, date2, group)
+            def fetch():
+                client = YandexMetrikaClient(self.access_token)
+                return client.api_stat_traffic_summary(self.counter, date1, date2, group)
+
+            key = analytics.get_cache_key('yandex_metrika', self.access_token, self.counter, self.period, group)
+            result, exception = analytics.get_response(key, fetch)
 
             if exception is not None:
                 error = _('API request failed.')
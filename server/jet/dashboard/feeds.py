@@ -0,0 +1,125 @@
+import datetime
+import hashlib
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.core.cache import cache
+from jet.dashboard import settings
+
+
+class FeedTooLarge(Exception):
+    pass
+
+
+def get_cache_key(url):
+    return 'jet:feed:%s' % hashlib.md5(url.encode()).hexdigest()
+
+
+def get_lock_key(url):
+    return 'jet:feed_lock:%s' % hashlib.md5(url.encode()).hexdigest()
+
+
+def fetch_feed(url, etag=None, modified=None):
+    """
+    Returns (content, etag, modified), content is None when the feed has not changed since the given
+    ETag or Last-Modified.
+    """
+    headers = {'User-Agent': 'django-jet'}
+
+    if etag:
+        headers['If-None-Match'] = etag
+    if modified:
+        headers['If-Modified-Since'] = modified
+
+    try:
+        response = urlopen(Request(url, headers=headers), timeout=settings.JET_FEED_TIMEOUT)
+    except HTTPError as e:
+        if e.code == 304:
+            return None, etag, modified
+        raise
+
+    with response:
+        content = response.read(settings.JET_FEED_MAX_BYTES + 1)
+
+        if len(content) > settings.JET_FEED_MAX_BYTES:
+            raise FeedTooLarge('%s is larger than %d bytes' % (url, settings.JET_FEED_MAX_BYTES))
+
+        return content, response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+
+def parse_entries(content):
+    import feedparser
+
+    feed = feedparser.parse(content)
+    entries = []
+
+    for entry in feed['entries'][:settings.JET_FEED_MAX_ENTRIES]:
+        item = {'title': entry.get('title', ''), 'link': entry.get('link', '')}
+
+        try:
+            item['date'] = datetime.date(*entry.published_parsed[0:3])
+        except (AttributeError, TypeError):
+            pass
+
+        entries.append(item)
+
+    return entries
+
+
+def refresh_feed(url):
+    """
+    Fetches the feed into the cache. A failed fetch keeps the entries fetched before.
+    """
+    key = get_cache_key(url)
+    cached = cache.get(key) or {'entries': []}
+
+    try:
+        content, etag, modified = fetch_feed(url, cached.get('etag'), cached.get('modified'))
+    except Exception as e:
+        data = dict(cached, fetched=time.time(), error=str(e))
+    else:
+        if content is None:
+            data = dict(cached, fetched=time.time(), error=None)
+        else:
+            data = {
+                'entries': parse_entries(content),
+                'etag': etag,
+                'modified': modified,
+                'fetched': time.time(),
+                'error': None,
+            }
+
+    cache.set(key, data, settings.JET_FEED_CACHE_TIMEOUT)
+    return data
+
+
+def refresh_feed_in_background(url):
+    # only one process refreshes a feed at a time, the others keep serving the cached entries
+    lock_key = get_lock_key(url)
+
+    if not cache.add(lock_key, True, settings.JET_FEED_TIMEOUT * 3):
+        return False
+
+    def run():
+        try:
+            refresh_feed(url)
+        finally:
+            cache.delete(lock_key)
+
+    threading.Thread(target=run, name='jet-feed-refresh', daemon=True).start()
+    return True
+
+
+def get_feed(url):
+    """
+    Returns the cached feed, or None when it has not been fetched yet. A missing or stale feed is
+    refreshed in the background, the render never waits for it.
+    """
+    data = cache.get(get_cache_key(url))
+
+    if data is None or time.time() - data['fetched'] > settings.JET_FEED_REFRESH_INTERVAL:
+        refresh_feed_in_background(url)
+
+    return data
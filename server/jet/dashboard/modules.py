@@ -1,11 +1,15 @@
+import hashlib
 import json
 from django import forms
+from django.core.cache import cache
 from django.contrib.admin.models import LogEntry
 from django.db.models import Q
 from django.template.loader import render_to_string
+from django.utils import translation
 from django.utils.translation import ugettext_lazy as _
-from jet.utils import get_app_list, LazyDateTimeEncoder, context_to_dict
-import datetime
+from jet.dashboard import settings as dashboard_settings
+from jet.dashboard.feeds import get_feed
+from jet.utils import get_app_list, get_menu_version, LazyDateTimeEncoder, context_to_dict
 
 
 class DashboardModule(object):
@@ -67,6 +71,18 @@ class DashboardModule(object):
     #: Optional style attributes which will be applied to widget content container.
     style = False
 
+    #: Seconds the rendered widget is cached for, ``0`` disables caching.
+    #: ``None`` uses ``JET_DASHBOARD_MODULE_CACHE_TIMEOUT``.
+    cache_timeout = None
+
+    #: Seconds the widget may take to render with the dashboard before it is loaded with AJAX instead.
+    #: ``None`` uses ``JET_DASHBOARD_MODULE_TIMEOUT``.
+    render_timeout = None
+
+    #: Attributes ``init_with_context`` may set which are cached along with the rendered content.
+    cached_attributes = ('title_url', 'css_classes', 'pre_content', 'post_content', 'contrast', 'style')
+    rendered = None
+
     class Media:
         css = ()
         js = ()
@@ -154,9 +170,55 @@ class DashboardModule(object):
         })
         return context
 
+    def get_cache_timeout(self):
+        if self.cache_timeout is None:
+            return dashboard_settings.JET_DASHBOARD_MODULE_CACHE_TIMEOUT
+        return self.cache_timeout
+
+    def get_render_timeout(self):
+        if self.render_timeout is None:
+            return dashboard_settings.JET_DASHBOARD_MODULE_TIMEOUT
+        return self.render_timeout
+
+    def get_cache_key(self):
+        """
+        Widgets are cached per saved module, changing its title, settings or children changes the key.
+        """
+        if self.model is None or self.model.pk is None or not self.get_cache_timeout():
+            return
+
+        parts = [self.fullname(), self.model.title, self.model.settings, self.model.children,
+                 translation.get_language(), get_menu_version()]
+        return 'jet:dashboard_module:%s:%s' % (self.model.pk, hashlib.md5(repr(parts).encode()).hexdigest())
+
+    def load_cached(self):
+        key = self.get_cache_key()
+        cached = cache.get(key) if key else None
+
+        if cached is None:
+            return False
+
+        for name, value in cached['attributes'].items():
+            setattr(self, name, value)
+        self.rendered = cached['content']
+
+        return True
+
     def render(self):
-        self.init_with_context(self.context)
-        return render_to_string(self.template, self.get_context_data())
+        if self.rendered is None and not self.load_cached():
+            self.init_with_context(self.context)
+            content = render_to_string(self.template, self.get_context_data())
+            key = self.get_cache_key()
+
+            if key:
+                cache.set(key, {
+                    'content': content,
+                    'attributes': dict((name, getattr(self, name)) for name in self.cached_attributes)
+                }, self.get_cache_timeout())
+
+            self.rendered = content
+
+        return self.rendered
 
 
 class LinkListItemForm(forms.Form):
@@ -461,6 +523,9 @@ class RecentActions(DashboardModule):
     settings_form = RecentActionsSettingsForm
     user = None
 
+    # every change made in the admin adds an entry
+    cache_timeout = 0
+
     def __init__(self, title=None, limit=10, **kwargs):
         kwargs.update({'limit': limit})
         super(RecentActions, self).__init__(title, **kwargs)
@@ -563,6 +628,9 @@ class Feed(DashboardModule):
     settings_form = FeedSettingsForm
     ajax_load = True
 
+    # the entries have a cache of their own
+    cache_timeout = 0
+
     def __init__(self, title=None, feed_url=None, limit=None, **kwargs):
         kwargs.update({'feed_url': feed_url, 'limit': limit})
         super(Feed, self).__init__(title, **kwargs)
@@ -580,30 +648,24 @@ class Feed(DashboardModule):
     def init_with_context(self, context):
         if self.feed_url is not None:
             try:
-                import feedparser
-
-                feed = feedparser.parse(self.feed_url)
-
-                if self.limit is not None:
-                    entries = feed['entries'][:self.limit]
-                else:
-                    entries = feed['entries']
-
-                for entry in entries:
-                    try:
-                        entry.date = datetime.date(*entry.published_parsed[0:3])
-                    except:
-                        pass
-
-                    self.children.append(entry)
+                import feedparser  # noqa: F401
             except ImportError:
                 self.children.append({
                     'title': _('You must install the FeedParser python module'),
                     'warning': True,
                 })
+                return
+
+            # read from the cache only, the feed is fetched in the background
+            feed = get_feed(self.feed_url)
+            entries = feed['entries'] if feed is not None else []
+
+            if self.limit is not None:
+                entries = entries[:self.limit]
+
+            self.children.extend(entries)
         else:
             self.children.append({
                 'title': _('You must provide a valid feed URL'),
                 'warning': True,
             })
-
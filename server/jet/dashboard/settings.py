@@ -2,4 +2,30 @@ from django.conf import settings
 
 # Dashboard
 JET_INDEX_DASHBOARD = getattr(settings, 'JET_INDEX_DASHBOARD', 'jet.dashboard.dashboard.DefaultIndexDashboard')
-JET_APP_INDEX_DASHBOARD = getattr(settings, 'JET_APP_INDEX_DASHBOARD', 'jet.dashboard.dashboard.DefaultAppIndexDashboard')
\ No newline at end of file
+JET_APP_INDEX_DASHBOARD = getattr(settings, 'JET_APP_INDEX_DASHBOARD', 'jet.dashboard.dashboard.DefaultAppIndexDashboard')
+
+# Seconds a rendered widget is cached for, 0 disables the cache
+JET_DASHBOARD_MODULE_CACHE_TIMEOUT = getattr(settings, 'JET_DASHBOARD_MODULE_CACHE_TIMEOUT', 300)
+
+# Threads rendering the widgets that are not cached, 0 or 1 renders them in the request
+JET_DASHBOARD_RENDER_THREADS = getattr(settings, 'JET_DASHBOARD_RENDER_THREADS', 4)
+
+# Seconds a widget may take to render before it is loaded with AJAX instead
+JET_DASHBOARD_MODULE_TIMEOUT = getattr(settings, 'JET_DASHBOARD_MODULE_TIMEOUT', 2)
+
+# Seconds the AJAX load of a timed out widget waits for its render still running on the threads
+JET_DASHBOARD_RENDER_WAIT_TIMEOUT = getattr(settings, 'JET_DASHBOARD_RENDER_WAIT_TIMEOUT', 30)
+
+# Feed widget: seconds before a cached feed is fetched again in the background, seconds it is kept
+# for when the feed cannot be fetched, and limits of a single fetch
+JET_FEED_REFRESH_INTERVAL = getattr(settings, 'JET_FEED_REFRESH_INTERVAL', 1800)
+JET_FEED_CACHE_TIMEOUT = getattr(settings, 'JET_FEED_CACHE_TIMEOUT', 7 * 24 * 3600)
+JET_FEED_TIMEOUT = getattr(settings, 'JET_FEED_TIMEOUT', 10)
+JET_FEED_MAX_BYTES = getattr(settings, 'JET_FEED_MAX_BYTES', 1024 * 1024)
+JET_FEED_MAX_ENTRIES = getattr(settings, 'JET_FEED_MAX_ENTRIES', 50)
+
+# Analytics widgets: seconds an API response is shared for, 0 requests the API on every render, and
+# seconds a render waits for the same request already made by another one
+JET_ANALYTICS_CACHE_TIMEOUT = getattr(settings, 'JET_ANALYTICS_CACHE_TIMEOUT', 600)
+JET_ANALYTICS_LOCK_TIMEOUT = getattr(settings, 'JET_ANALYTICS_LOCK_TIMEOUT', 30)
+JET_ANALYTICS_LOCK_POLL_INTERVAL = getattr(settings, 'JET_ANALYTICS_LOCK_POLL_INTERVAL', 0.1)
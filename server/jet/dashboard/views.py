@@ -8,6 +8,7 @@ except ImportError: # Django 1.11
 from django.forms.formsets import formset_factory
 from django.http import HttpResponseRedirect
 from django.views.decorators.http import require_POST, require_GET
+from jet.dashboard.dashboard import wait_for_render
 from jet.dashboard.forms import UpdateDashboardModulesForm, AddUserDashboardModuleForm, \
     UpdateDashboardModuleCollapseForm, RemoveDashboardModuleForm, ResetDashboardForm
 from jet.dashboard.models import UserDashboardModule
@@ -222,6 +223,7 @@ def load_dashboard_module_view(request, pk):
         instance = UserDashboardModule.objects.get(pk=pk, user=request.user.pk)
         module_cls = instance.load_module()
         module = module_cls(model=instance, context={'request': request})
+        wait_for_render(module)
         result['html'] = module.render()
     except (ValidationError, UserDashboardModule.DoesNotExist):
         result['error'] = True
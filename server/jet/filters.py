@@ -1,6 +1,7 @@
 from django.contrib.admin import RelatedFieldListFilter
 from django.utils.encoding import smart_str as smart_text
 from django.utils.html import format_html
+from jet.utils import get_initial_objects_loader
 try:
     from django.core.urlresolvers import reverse
 except ImportError: # Django 1.11
@@ -17,6 +18,39 @@ except ImportError: # Django 1.6
     from django.forms.util import flatatt
 
 
+class LazyChoices(list):
+    """
+    Choices loaded when the filter is rendered, after every filter of the
+    changelist has added its value to the request's loader.
+    """
+
+    def __init__(self, loader, model, values, field_name):
+        super(LazyChoices, self).__init__()
+        self.loader = loader
+        self.model = model
+        self.values = values
+        self.field_name = field_name
+        self.loaded = False
+
+    def load(self):
+        if not self.loaded:
+            self.loaded = True
+            objects = self.loader.get(self.model, self.values, self.field_name)
+            self.extend([(x._get_pk_val(), smart_text(x)) for x in objects])
+
+    def __iter__(self):
+        self.load()
+        return super(LazyChoices, self).__iter__()
+
+    def __len__(self):
+        self.load()
+        return super(LazyChoices, self).__len__()
+
+    def __getitem__(self, item):
+        self.load()
+        return super(LazyChoices, self).__getitem__(item)
+
+
 class RelatedFieldAjaxListFilter(RelatedFieldListFilter):
     template = 'jet/related_field_ajax_list_filter.html'
     ajax_attrs = None
@@ -45,8 +79,9 @@ class RelatedFieldAjaxListFilter(RelatedFieldListFilter):
         else:
             rel_name = other_model._meta.pk.name
 
-        queryset = model._default_manager.filter(**{rel_name: self.lookup_val}).all()
-        return [(x._get_pk_val(), smart_text(x)) for x in queryset]
+        loader = get_initial_objects_loader(request)
+        loader.add(model, [self.lookup_val], rel_name)
+        return LazyChoices(loader, model, [self.lookup_val], rel_name)
 
 
 try:
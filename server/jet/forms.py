@@ -8,7 +8,12 @@ import operator
 
 from jet.models import Bookmark, PinnedApplication
 from jet.utils import get_model_instance_label, user_is_authenticated
-from functools import reduce
+from functools import lru_cache, reduce
+
+try:
+    from django.contrib.admin.utils import lookup_spawns_duplicates
+except ImportError:  # Django < 4.0
+    from django.contrib.admin.utils import lookup_needs_distinct as lookup_spawns_duplicates
 
 try:
     from django.apps import apps
@@ -93,6 +98,52 @@ class ToggleApplicationPinForm(forms.ModelForm):
                 return True
 
 
+@lru_cache(maxsize=128)
+def get_lookup_model(app_label, model_name):
+    """
+    Returns the model class and the codename of its change permission,
+    resolved once per process instead of on every autocomplete request.
+    Model names are case-insensitive, pass them lower-cased so that the
+    variants share one entry.
+    """
+    model_cls = get_model(app_label, model_name)
+    content_type = ContentType.objects.get_for_model(model_cls)
+    permission = Permission.objects.filter(content_type=content_type, codename__startswith='change_').first()
+
+    if permission is None:
+        raise LookupError('%s.%s has no change permission' % (app_label, model_name))
+
+    return model_cls, permission.codename
+
+
+def get_search_lookup(field_name):
+    if field_name.startswith('^'):
+        return '%s__istartswith' % field_name[1:]
+    elif field_name.startswith('='):
+        return '%s__iexact' % field_name[1:]
+    else:
+        return '%s__icontains' % field_name
+
+
+def get_search_queryset(queryset, search_fields, query):
+    """
+    Search fields take the prefixes of ModelAdmin.search_fields: ^ matches
+    the beginning and = the whole value, so that an index can be used.
+    """
+    if isinstance(search_fields, str):
+        search_fields = (search_fields,)
+
+    opts = queryset.model._meta
+    lookups = list(map(get_search_lookup, search_fields))
+    filter_data = [Q((lookup, query)) for lookup in lookups]
+    queryset = queryset.filter(reduce(operator.or_, filter_data))
+
+    if any(lookup_spawns_duplicates(opts, lookup) for lookup in lookups):
+        queryset = queryset.distinct()
+
+    return queryset
+
+
 class ModelLookupForm(forms.Form):
     app_label = forms.CharField()
     model = forms.CharField()
@@ -113,28 +164,25 @@ class ModelLookupForm(forms.Form):
             raise ValidationError('error')
 
         try:
-            self.model_cls = get_model(data['app_label'], data['model'])
+            self.model_cls, codename = get_lookup_model(data['app_label'], data['model'].lower())
         except:
             raise ValidationError('error')
 
-        content_type = ContentType.objects.get_for_model(self.model_cls)
-        permission = Permission.objects.filter(content_type=content_type, codename__startswith='change_').first()
-
-        if not self.request.user.has_perm('{}.{}'.format(data['app_label'], permission.codename)):
+        if not self.request.user.has_perm('{}.{}'.format(data['app_label'], codename)):
             raise ValidationError('error')
 
         return data
 
     def lookup(self):
-        qs = self.model_cls.objects
+        qs = self.model_cls._default_manager.all()
+        query = self.cleaned_data['q']
 
-        if self.cleaned_data['q']:
-            if getattr(self.model_cls, 'autocomplete_search_fields', None):
+        if query:
+            if getattr(self.model_cls, 'autocomplete_search', None):
+                qs = self.model_cls.autocomplete_search(qs, query)
+            elif getattr(self.model_cls, 'autocomplete_search_fields', None):
                 search_fields = self.model_cls.autocomplete_search_fields()
-                filter_data = [Q((field + '__icontains', self.cleaned_data['q'])) for field in search_fields]
-                # if self.cleaned_data['object_id']:
-                #     filter_data.append(Q(pk=self.cleaned_data['object_id']))
-                qs = qs.filter(reduce(operator.or_, filter_data)).distinct()
+                qs = get_search_queryset(qs, search_fields, query)
             else:
                 qs = qs.none()
 
@@ -142,10 +190,13 @@ class ModelLookupForm(forms.Form):
         page = self.cleaned_data['page'] or 1
         offset = (page - 1) * limit
 
+        # one extra row tells whether there is a next page, select2 needs
+        # nothing more than that and counting every match is slow
+        instances = list(qs[offset:offset + limit + 1])
         items = list(map(
             lambda instance: {'id': instance.pk, 'text': get_model_instance_label(instance)},
-            qs.all()[offset:offset + limit]
+            instances[:limit]
         ))
-        total = qs.count()
+        total = offset + len(instances)
 
         return items, total
@@ -11,3 +11,6 @@ JET_SIDE_MENU_CUSTOM_APPS = getattr(settings, 'JET_SIDE_MENU_CUSTOM_APPS', None)
 
 # Improved usability
 JET_CHANGE_FORM_SIBLING_LINKS = getattr(settings, 'JET_CHANGE_FORM_SIBLING_LINKS', True)
+
+# Seconds the app list and side menu stay cached, 0 disables the cache
+JET_MENU_CACHE_TIMEOUT = getattr(settings, 'JET_MENU_CACHE_TIMEOUT', 300)
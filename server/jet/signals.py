@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from jet.forms import get_lookup_model
+from jet.models import PinnedApplication
+from jet.utils import bump_menu_version, get_pinned_apps_cache_key
+
+
+def permissions_changed_handler(**kwargs):
+    bump_menu_version()
+
+
+def permission_saved_handler(**kwargs):
+    bump_menu_version()
+    get_lookup_model.cache_clear()
+
+
+def pinned_application_changed_handler(instance, **kwargs):
+    cache.delete(get_pinned_apps_cache_key(instance.user))
+
+
+def connect_signals():
+    User = get_user_model()
+
+    post_save.connect(permission_saved_handler, sender=Permission)
+    post_delete.connect(permission_saved_handler, sender=Permission)
+    post_save.connect(permissions_changed_handler, sender=Group)
+    post_delete.connect(permissions_changed_handler, sender=Group)
+
+    for through in (Group.permissions.through, User.groups.through, User.user_permissions.through):
+        m2m_changed.connect(permissions_changed_handler, sender=through)
+
+    post_save.connect(pinned_application_changed_handler, sender=PinnedApplication)
+    post_delete.connect(pinned_application_changed_handler, sender=PinnedApplication)
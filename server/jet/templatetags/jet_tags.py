@@ -15,7 +15,7 @@ from django.utils.encoding import smart_str as smart_text
 from jet import settings, VERSION
 from jet.models import Bookmark
 from jet.utils import get_model_instance_label, get_model_queryset, get_possible_language_codes, \
-    get_admin_site, get_menu_items
+    get_admin_site, get_menu_items, get_sibling_object, get_initial_objects_loader, InitialObjectsLoader
 
 try:
     from urllib.parse import parse_qsl
@@ -59,58 +59,106 @@ def jet_is_checkbox(field):
     return field.field.widget.__class__.__name__ == CheckboxInput().__class__.__name__
 
 
-@register.filter
-def jet_select2_lookups(field):
+def get_select2_model(field):
     if hasattr(field, 'field') and \
             (isinstance(field.field, ModelChoiceField) or isinstance(field.field, ModelMultipleChoiceField)):
-        qs = field.field.queryset
-        model = qs.model
+        model = field.field.queryset.model
 
         if getattr(model, 'autocomplete_search_fields', None) and getattr(field.field, 'autocomplete', True):
-            choices = []
-            app_label = model._meta.app_label
-            model_name = model._meta.object_name
-
-            attrs = {
-                'class': 'ajax',
-                'data-app-label': app_label,
-                'data-model': model_name,
-                'data-ajax--url': reverse('jet:model_lookup')
-            }
-
-            initial_value = field.value()
-
-            if hasattr(field, 'field') and isinstance(field.field, ModelMultipleChoiceField):
-                if initial_value:
-                    initial_objects = model.objects.filter(pk__in=initial_value)
-                    choices.extend(
-                        [(initial_object.pk, get_model_instance_label(initial_object))
-                            for initial_object in initial_objects]
-                    )
-
-                if isinstance(field.field.widget, RelatedFieldWidgetWrapper):
-                    field.field.widget.widget = SelectMultiple(attrs)
-                else:
-                    field.field.widget = SelectMultiple(attrs)
-                field.field.choices = choices
-            elif hasattr(field, 'field') and isinstance(field.field, ModelChoiceField):
-                if initial_value:
-                    try:
-                        initial_object = model.objects.get(pk=initial_value)
-                        attrs['data-object-id'] = initial_value
-                        choices.append((initial_object.pk, get_model_instance_label(initial_object)))
-                    except model.DoesNotExist:
-                        pass
-
-                if isinstance(field.field.widget, RelatedFieldWidgetWrapper):
-                    field.field.widget.widget = Select(attrs)
-                else:
-                    field.field.widget = Select(attrs)
-                field.field.choices = choices
+            return model
+
+
+def get_select2_initial_values(field):
+    initial_value = field.value()
+
+    if not initial_value:
+        return []
+    elif isinstance(field.field, ModelMultipleChoiceField):
+        return list(initial_value)
+    else:
+        return [initial_value]
+
+
+@register.filter
+def jet_select2_lookups(field, loader=None):
+    model = get_select2_model(field)
+
+    if model is not None:
+        choices = []
+        app_label = model._meta.app_label
+        model_name = model._meta.object_name
+
+        attrs = {
+            'class': 'ajax',
+            'data-app-label': app_label,
+            'data-model': model_name,
+            'data-ajax--url': reverse('jet:model_lookup')
+        }
+
+        if loader is None:
+            loader = InitialObjectsLoader()
+
+        initial_value = field.value()
+        initial_objects = loader.get(model, get_select2_initial_values(field))
+        choices.extend(
+            [(initial_object.pk, get_model_instance_label(initial_object))
+                for initial_object in initial_objects]
+        )
+
+        if isinstance(field.field, ModelMultipleChoiceField):
+            if isinstance(field.field.widget, RelatedFieldWidgetWrapper):
+                field.field.widget.widget = SelectMultiple(attrs)
+            else:
+                field.field.widget = SelectMultiple(attrs)
+            field.field.choices = choices
+        else:
+            if initial_objects:
+                attrs['data-object-id'] = initial_value
+
+            if isinstance(field.field.widget, RelatedFieldWidgetWrapper):
+                field.field.widget.widget = Select(attrs)
+            else:
+                field.field.widget = Select(attrs)
+            field.field.choices = choices
 
     return field
 
 
+def get_context_forms(context):
+    adminform = context.get('adminform')
+
+    if adminform is not None:
+        yield adminform.form
+
+    for inline_admin_formset in context.get('inline_admin_formsets') or []:
+        for form in inline_admin_formset.formset.forms:
+            yield form
+
+
+@assignment_tag(takes_context=True)
+def jet_select2_field(context, field):
+    """
+    jet_select2_lookups with the initial objects of every select2 field of
+    the change form and its inlines loaded together, once per request.
+    """
+    request = context.get('request')
+    loader = get_initial_objects_loader(request)
+
+    if not getattr(request, '_jet_select2_collected', False):
+        for form in get_context_forms(context):
+            for name in form.fields:
+                bound_field = form[name]
+                model = get_select2_model(bound_field)
+
+                if model is not None:
+                    loader.add(model, get_select2_initial_values(bound_field))
+
+        if request is not None:
+            request._jet_select2_collected = True
+
+    return jet_select2_lookups(field, loader)
+
+
 @assignment_tag(takes_context=True)
 def jet_get_current_theme(context):
     if 'request' in context and 'JET_THEME' in context['request'].COOKIES:
@@ -170,16 +218,7 @@ def jet_sibling_object(context, next):
     if queryset is None:
         return
 
-    sibling_object = None
-    object_pks = list(queryset.values_list('pk', flat=True))
-
-    try:
-        index = object_pks.index(original.pk)
-        sibling_index = index + 1 if next else index - 1
-        exists = sibling_index < len(object_pks) if next else sibling_index >= 0
-        sibling_object = queryset.get(pk=object_pks[sibling_index]) if exists else None
-    except ValueError:
-        pass
+    sibling_object = get_sibling_object(queryset, original, next)
 
     if sibling_object is None:
         return
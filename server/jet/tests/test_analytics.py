@@ -0,0 +1,90 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from jet.dashboard import analytics
+from jet.dashboard.dashboard_modules.yandex_metrika import YandexMetrikaClient, YandexMetrikaVisitorsTotals
+
+
+class AnalyticsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = []
+
+    def stub(self, *args, **kwargs):
+        self.calls.append(args)
+        time.sleep(0.2)
+        return {'totals': {'visits': 10, 'visitors': 5, 'page_views': 20}}, None
+
+    def get_module(self, counter='1', period=7, access_token='token'):
+        module = YandexMetrikaVisitorsTotals()
+        module.access_token = access_token
+        module.counter = counter
+        module.period = period
+        return module
+
+    def test_response_cached(self):
+        with mock.patch.object(YandexMetrikaClient, 'api_stat_traffic_summary', self.stub):
+            first = self.get_module().api_stat_traffic_summary()
+            second = self.get_module().api_stat_traffic_summary()
+            self.get_module(period=30).api_stat_traffic_summary()
+            self.get_module(counter='2').api_stat_traffic_summary()
+            self.get_module().api_stat_traffic_summary('week')
+            self.get_module(access_token='other').api_stat_traffic_summary()
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.calls), 5)
+
+    def test_concurrent_requests_coalesced(self):
+        results = []
+
+        def render():
+            results.append(self.get_module().api_stat_traffic_summary())
+
+        with mock.patch.object(YandexMetrikaClient, 'api_stat_traffic_summary', self.stub):
+            threads = [threading.Thread(target=render) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_failed_response_not_cached(self):
+        error = ValueError('failed')
+        fetch = mock.Mock(side_effect=[(None, error), ({'ok': True}, None)])
+        key = analytics.get_cache_key('test', 'token', '1', 7)
+
+        self.assertEqual(analytics.get_response(key, fetch), (None, error))
+        self.assertEqual(analytics.get_response(key, fetch), ({'ok': True}, None))
+        self.assertEqual(analytics.get_response(key, fetch), ({'ok': True}, None))
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_raised_exception_returned(self):
+        error = ValueError('failed')
+        key = analytics.get_cache_key('test', 'token', '1', 7)
+
+        self.assertEqual(analytics.get_response(key, mock.Mock(side_effect=error)), (None, error))
+
+    def test_waits_for_other_process(self):
+        key = analytics.get_cache_key('test', 'token', '1', 7)
+        fetch = mock.Mock(return_value=({'ok': True}, None))
+        cache.add('%s:lock' % key, True)
+
+        def finish():
+            time.sleep(0.2)
+            cache.set(key, {'ok': 'shared'})
+
+        thread = threading.Thread(target=finish)
+        thread.start()
+
+        try:
+            self.assertEqual(analytics.get_response(key, fetch), ({'ok': 'shared'}, None))
+        finally:
+            thread.join()
+
+        fetch.assert_not_called()
@@ -1,12 +1,16 @@
+import time
 from django.contrib.auth.models import User
+from django.core.cache import cache
 try:
     from django.core.urlresolvers import reverse
 except ImportError: # Django 1.11
     from django.urls import reverse
 
 from django.test import TestCase, Client
-from jet.dashboard.dashboard import Dashboard
-from jet.dashboard.modules import LinkList, RecentActions
+from unittest import mock
+from jet.dashboard import settings as dashboard_settings
+from jet.dashboard.dashboard import Dashboard, pending_renders
+from jet.dashboard.modules import DashboardModule, LinkList, RecentActions
 from jet.dashboard.models import UserDashboardModule
 from jet.tests.dashboard import TestIndexDashboard
 
@@ -87,3 +91,98 @@ class DashboardTestCase(TestCase):
 
         self.assertIsInstance(dashboard, Dashboard)
         self.assertEqual(dashboard.app_label, app_label)
+
+    def test_module_render_cached(self):
+        cache.clear()
+        module_model = UserDashboardModule.objects.get(module='jet.dashboard.modules.LinkList')
+        module_model.children = '[{"title": "Docs", "url": "http://docs.djangoproject.com/"}]'
+        module_model.save()
+
+        content = LinkList(model=module_model, context={'request': self.Request(self.admin_user)}).render()
+        self.assertIn('http://docs.djangoproject.com/', content)
+
+        module = LinkList(model=module_model, context={'request': self.Request(self.admin_user)})
+        with mock.patch.object(LinkList, 'init_with_context') as init_with_context:
+            self.assertEqual(module.render(), content)
+        init_with_context.assert_not_called()
+
+        module_model.children = '[{"title": "Python", "url": "https://www.python.org/"}]'
+        module_model.save()
+        module = LinkList(model=module_model, context={'request': self.Request(self.admin_user)})
+        self.assertIn('https://www.python.org/', module.render())
+
+    def test_render_modules_timeout(self):
+        class SlowModule(DashboardModule):
+            cache_timeout = 0
+            render_timeout = 0.1
+
+            def render(self):
+                time.sleep(1)
+                return super(SlowModule, self).render()
+
+        class FastModule(DashboardModule):
+            cache_timeout = 0
+
+            def render(self):
+                self.rendered = 'fast'
+                return self.rendered
+
+        module_model = UserDashboardModule.objects.get(module='jet.dashboard.modules.LinkList')
+        slow_module = SlowModule(model=module_model, context={})
+        fast_module = FastModule(model=module_model, context={})
+        self.dashboard.modules = [slow_module, fast_module]
+
+        with mock.patch.object(dashboard_settings, 'JET_DASHBOARD_RENDER_THREADS', 2):
+            self.dashboard.render_modules()
+
+        self.assertTrue(slow_module.ajax_load)
+        self.assertFalse(fast_module.ajax_load)
+        self.assertEqual(fast_module.rendered, 'fast')
+
+    def test_timed_out_render_keeps_page_module(self):
+        class SlowModule(DashboardModule):
+            cache_timeout = 0
+            render_timeout = 0.1
+
+            def init_with_context(self, context):
+                time.sleep(0.3)
+                self.children.append('child')
+                self.title_url = 'http://example.com/'
+
+        module_model = UserDashboardModule.objects.get(module='jet.dashboard.modules.LinkList')
+        slow_module = SlowModule(model=module_model, context={})
+        self.dashboard.modules = [slow_module, SlowModule(model=module_model, context={})]
+
+        with mock.patch.object(dashboard_settings, 'JET_DASHBOARD_RENDER_THREADS', 2):
+            self.dashboard.render_modules()
+        time.sleep(0.5)
+
+        self.assertTrue(slow_module.ajax_load)
+        self.assertEqual(slow_module.children, [])
+        self.assertIsNone(slow_module.title_url)
+        self.assertIsNone(slow_module.rendered)
+
+    def test_ajax_load_waits_for_pending_render(self):
+        cache.clear()
+        calls = []
+
+        def init_with_context(module, context):
+            calls.append(module)
+            time.sleep(0.3)
+
+        module_model = UserDashboardModule.objects.get(module='jet.dashboard.modules.LinkList')
+        self.dashboard.modules = [
+            LinkList(model=module_model, context={'request': self.Request(self.admin_user)}, render_timeout=0.1),
+            RecentActions(model=module_model, context={}, cache_timeout=0),
+        ]
+
+        with mock.patch.object(LinkList, 'init_with_context', init_with_context), \
+                mock.patch.object(RecentActions, 'render', return_value=''), \
+                mock.patch.object(dashboard_settings, 'JET_DASHBOARD_RENDER_THREADS', 2):
+            self.dashboard.render_modules()
+            self.assertEqual(len(pending_renders), 1)
+            response = self.admin.get(reverse('jet-dashboard:load_dashboard_module', kwargs={'pk': module_model.pk}))
+
+        self.assertTrue(self.dashboard.modules[0].ajax_load)
+        self.assertFalse(response.json()['error'])
+        self.assertEqual(len(calls), 1)
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.test import TestCase
+from jet.dashboard import feeds, settings as dashboard_settings
+from jet.dashboard.modules import Feed
+
+try:
+    import feedparser
+except ImportError:
+    feedparser = None
+
+RSS = b'''<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel><title>News</title>
+<item><title>First</title><link>http://example.com/1</link><pubDate>Mon, 02 Jan 2017 10:00:00 GMT</pubDate></item>
+<item><title>Second</title><link>http://example.com/2</link></item>
+</channel></rss>'''
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.headers.get('If-None-Match'))
+
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Type', 'application/rss+xml')
+        self.end_headers()
+        self.wfile.write(RSS)
+
+    def log_message(self, *args):
+        pass
+
+
+@skipUnless(feedparser, 'feedparser is not installed')
+class FeedsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        handle, self.path = tempfile.mkstemp(suffix='.xml')
+        with os.fdopen(handle, 'wb') as file:
+            file.write(RSS)
+        self.url = 'file://' + self.path
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_refresh_feed_from_file(self):
+        data = feeds.refresh_feed(self.url)
+
+        self.assertIsNone(data['error'])
+        self.assertEqual([entry['title'] for entry in data['entries']], ['First', 'Second'])
+        self.assertEqual(data['entries'][0]['link'], 'http://example.com/1')
+        self.assertEqual(data['entries'][0]['date'].year, 2017)
+
+    def test_get_feed_reads_cache(self):
+        with mock.patch.object(feeds, 'refresh_feed_in_background') as refresh:
+            self.assertIsNone(feeds.get_feed(self.url))
+            refresh.assert_called_once_with(self.url)
+
+        feeds.refresh_feed(self.url)
+
+        with mock.patch.object(feeds, 'refresh_feed_in_background') as refresh:
+            self.assertEqual(len(feeds.get_feed(self.url)['entries']), 2)
+            refresh.assert_not_called()
+
+    def test_get_feed_stale_while_revalidate(self):
+        data = feeds.refresh_feed(self.url)
+        data['fetched'] = time.time() - dashboard_settings.JET_FEED_REFRESH_INTERVAL - 1
+        cache.set(feeds.get_cache_key(self.url), data)
+
+        with mock.patch.object(feeds, 'refresh_feed_in_background') as refresh:
+            self.assertEqual(len(feeds.get_feed(self.url)['entries']), 2)
+            refresh.assert_called_once_with(self.url)
+
+    def test_refresh_feed_too_large(self):
+        feeds.refresh_feed(self.url)
+
+        with mock.patch.object(dashboard_settings, 'JET_FEED_MAX_BYTES', 10):
+            data = feeds.refresh_feed(self.url)
+
+        self.assertIn('larger than', data['error'])
+        self.assertEqual(len(data['entries']), 2)
+
+    def test_refresh_feed_conditional_get(self):
+        FeedHandler.requests = []
+        server = HTTPServer(('127.0.0.1', 0), FeedHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        try:
+            url = 'http://127.0.0.1:%d/rss/' % server.server_port
+            self.assertEqual(len(feeds.refresh_feed(url)['entries']), 2)
+            data = feeds.refresh_feed(url)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(FeedHandler.requests, [None, '"v1"'])
+        self.assertIsNone(data['error'])
+        self.assertEqual(len(data['entries']), 2)
+
+    def test_feed_module(self):
+        feeds.refresh_feed(self.url)
+        module = Feed(feed_url=self.url, limit=1)
+
+        with mock.patch.object(feeds, 'refresh_feed_in_background'):
+            module.init_with_context({})
+
+        self.assertEqual([child['title'] for child in module.children], ['First'])
@@ -5,7 +5,7 @@ except ImportError: # Django 1.11
     from django.urls import reverse
 
 from django.test import TestCase
-from jet.templatetags.jet_tags import jet_select2_lookups, jet_next_object, jet_previous_object
+from jet.templatetags.jet_tags import jet_select2_lookups, jet_select2_field, jet_next_object, jet_previous_object
 from jet.tests.models import TestModel, SearchableTestModel
 from django.test.client import RequestFactory
 
@@ -47,6 +47,29 @@ class TagsTestCase(TestCase):
         self.assertEqual(len(choices), 1)
         self.assertEqual(choices[0][0], value.pk)
 
+    def test_select2_field_batched(self):
+        class TestForm(forms.Form):
+            first_field = forms.ModelChoiceField(SearchableTestModel.objects)
+            second_field = forms.ModelMultipleChoiceField(SearchableTestModel.objects)
+
+        class AdminForm:
+            form = TestForm(initial={
+                'first_field': self.searchable_models[0].pk,
+                'second_field': [model.pk for model in self.searchable_models],
+            })
+
+        context = {'adminform': AdminForm(), 'request': RequestFactory().get('/')}
+
+        with self.assertNumQueries(1):
+            first_field = jet_select2_field(context, AdminForm.form['first_field'])
+            second_field = jet_select2_field(context, AdminForm.form['second_field'])
+
+        self.assertEqual([choice[0] for choice in first_field.field.choices], [self.searchable_models[0].pk])
+        self.assertEqual(
+            [choice[0] for choice in second_field.field.choices],
+            [model.pk for model in self.searchable_models]
+        )
+
     def test_non_select2_lookups(self):
         class TestForm(forms.Form):
             form_field = forms.ModelChoiceField(TestModel.objects)
@@ -1,9 +1,20 @@
 from datetime import datetime, date
 import json
 from django.contrib.admin import AdminSite
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db.models import F
+try:
+    from django.core.urlresolvers import reverse
+except ImportError: # Django 1.11
+    from django.urls import reverse
+
 from django.test import TestCase
+from django.test.client import RequestFactory
+from jet.models import PinnedApplication
 from jet.tests.models import TestModel
-from jet.utils import JsonResponse, get_model_instance_label, get_app_list, get_admin_site, LazyDateTimeEncoder
+from jet.utils import JsonResponse, get_model_instance_label, get_app_list, get_admin_site, LazyDateTimeEncoder, \
+    get_sibling_object, get_menu_items
 
 
 class UtilsTestCase(TestCase):
@@ -68,3 +79,65 @@ class UtilsTestCase(TestCase):
         encoder = LazyDateTimeEncoder()
         self.assertEqual(encoder.encode({'key': 1}), '{"key": 1}')
 
+
+    def test_get_sibling_object(self):
+        models = [
+            TestModel.objects.create(field1='b', field2=1),
+            TestModel.objects.create(field1='a', field2=2),
+            TestModel.objects.create(field1='b', field2=3),
+            TestModel.objects.create(field1='c', field2=4),
+        ]
+        queryset = TestModel.objects.order_by('field1', '-pk')
+        ordered = list(queryset)
+
+        for index, instance in enumerate(ordered):
+            with self.assertNumQueries(2):
+                next_object = get_sibling_object(queryset, instance, True)
+            previous_object = get_sibling_object(queryset, instance, False)
+
+            self.assertEqual(next_object, ordered[index + 1] if index + 1 < len(ordered) else None)
+            self.assertEqual(previous_object, ordered[index - 1] if index > 0 else None)
+
+        filtered = queryset.exclude(pk=models[0].pk)
+        self.assertIsNone(get_sibling_object(filtered, models[0], True))
+
+    def test_get_sibling_object_descending(self):
+        models = [TestModel.objects.create(field1='a', field2=i) for i in range(3)]
+        queryset = TestModel.objects.order_by('-field2')
+
+        self.assertEqual(get_sibling_object(queryset, models[1], True), models[0])
+        self.assertEqual(get_sibling_object(queryset, models[1], False), models[2])
+
+    def test_get_sibling_object_unsupported_ordering(self):
+        models = [TestModel.objects.create(field1='a', field2=i) for i in range(3)]
+        queryset = TestModel.objects.order_by(F('field2').desc())
+
+        self.assertEqual(get_sibling_object(queryset, models[1], True), models[0])
+        self.assertEqual(get_sibling_object(queryset, models[1], False), models[2])
+
+    def test_get_menu_items_cached(self):
+        cache.clear()
+        user = User.objects.create_user('staff', 'staff@example.com', 'staff', is_staff=True)
+        group = Group.objects.create(name='editors')
+        user.groups.add(group)
+
+        def get_context():
+            request = RequestFactory().get(reverse('admin:index'))
+            request.user = User.objects.get(pk=user.pk)
+            return {'request': request, 'user': request.user}
+
+        self.assertEqual(get_menu_items(get_context()), [])
+
+        group.permissions.add(Permission.objects.get(codename='change_testmodel'))
+        app_list = get_menu_items(get_context())
+        self.assertEqual([app['app_label'] for app in app_list], ['tests'])
+        self.assertFalse(app_list[0]['pinned'])
+
+        context = get_context()
+        context['user'].get_all_permissions()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_menu_items(context), app_list)
+
+        PinnedApplication.objects.create(app_label='tests', user=user.pk)
+        self.assertTrue(get_menu_items(get_context())[0]['pinned'])
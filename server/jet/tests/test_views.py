@@ -7,7 +7,9 @@ except ImportError: # Django 1.11
 
 from django.test import TestCase, Client
 from jet.dashboard.modules import LinkList
+from jet.forms import get_lookup_model, get_search_queryset
 from jet.models import Bookmark
+from jet.tests.models import SearchableTestModel
 from jet.dashboard.models import UserDashboardModule
 
 
@@ -227,3 +229,50 @@ class ViewsTestCase(TestCase):
         response = json.loads(response.content.decode())
         self.assertFalse(response['error'])
         self.assertFalse(UserDashboardModule.objects.filter(pk=module.pk).exists())
+
+    def test_model_lookup_view(self):
+        for i in range(5):
+            SearchableTestModel.objects.create(field1='item%d' % i, field2=i)
+        SearchableTestModel.objects.create(field1='other', field2=5)
+
+        def lookup(**params):
+            params.update({'app_label': 'tests', 'model': 'SearchableTestModel'})
+            response = self.admin.get(reverse('jet:model_lookup'), params)
+            self.assertEqual(response.status_code, 200)
+            return json.loads(response.content.decode())
+
+        response = lookup(q='item', page_size=2)
+        self.assertFalse(response['error'])
+        self.assertEqual([item['text'] for item in response['items']], ['item00', 'item11'])
+        self.assertGreater(response['total'], 2)
+
+        response = lookup(q='item', page_size=2, page=3)
+        self.assertEqual([item['text'] for item in response['items']], ['item44'])
+        self.assertEqual(response['total'], 5)
+
+    def test_get_search_queryset(self):
+        SearchableTestModel.objects.create(field1='abc', field2=1)
+        SearchableTestModel.objects.create(field1='xabc', field2=2)
+        queryset = SearchableTestModel.objects.all()
+
+        self.assertEqual(get_search_queryset(queryset, ['field1'], 'ABC').count(), 2)
+        self.assertEqual(get_search_queryset(queryset, ['^field1'], 'ABC').count(), 1)
+        self.assertEqual(get_search_queryset(queryset, ['=field1'], 'xab').count(), 0)
+
+    def test_get_lookup_model(self):
+        get_lookup_model.cache_clear()
+        model_cls, codename = get_lookup_model('tests', 'SearchableTestModel')
+        self.assertEqual(model_cls, SearchableTestModel)
+        self.assertEqual(codename, 'change_searchabletestmodel')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_lookup_model('tests', 'SearchableTestModel'), (model_cls, codename))
+
+    def test_model_lookup_case_variants_cached_once(self):
+        get_lookup_model.cache_clear()
+
+        for model in ['SearchableTestModel', 'searchabletestmodel', 'SEARCHABLETESTMODEL']:
+            response = self.admin.get(reverse('jet:model_lookup'), {'app_label': 'tests', 'model': model})
+            self.assertFalse(json.loads(response.content.decode())['error'])
+
+        self.assertEqual(get_lookup_model.cache_info().currsize, 1)
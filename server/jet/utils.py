@@ -1,5 +1,7 @@
 import datetime
+import hashlib
 import json
+import time
 from django.template import Context
 from django.utils import translation
 from jet import settings
@@ -20,6 +22,10 @@ except ImportError: # Django 1.11
     from django.urls import reverse, resolve, NoReverseMatch
 
 from django.contrib.admin import AdminSite
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
 from django.utils.encoding import smart_str as smart_text
 from django.utils.text import capfirst
 from django.contrib import messages
@@ -57,10 +63,78 @@ class JsonResponse(HttpResponse):
         super(JsonResponse, self).__init__(content=data, **kwargs)
 
 
+MENU_VERSION_KEY = 'jet:menu_version'
+
+
+def get_menu_version():
+    return cache.get_or_set(MENU_VERSION_KEY, time.time_ns(), None)
+
+
+def bump_menu_version():
+    cache.set(MENU_VERSION_KEY, time.time_ns(), None)
+
+
+def get_permission_fingerprint(user):
+    if not hasattr(user, 'get_all_permissions'):
+        return
+
+    if user.is_active and user.is_superuser:
+        return 'superuser'
+
+    permissions = ','.join(sorted(user.get_all_permissions()))
+    return hashlib.md5(permissions.encode()).hexdigest()
+
+
+def get_menu_cache_key(name, admin_site, user, *parts):
+    fingerprint = get_permission_fingerprint(user)
+
+    # users that are not real user models (management commands) are not cached
+    if fingerprint is None:
+        return
+
+    parts = [admin_site.name, fingerprint, translation.get_language(), get_menu_version()] + list(parts)
+    return 'jet:%s:%s' % (name, hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def get_cached(key, build):
+    """
+    Menus only depend on the admin registry and the user's permissions, so
+    they are kept in the cache until a permission, a group or a pin changes.
+    """
+    if key is None or not settings.JET_MENU_CACHE_TIMEOUT:
+        return build()
+
+    value = cache.get(key)
+
+    if value is None:
+        value = build()
+        cache.set(key, value, settings.JET_MENU_CACHE_TIMEOUT)
+
+    return value
+
+
+def get_pinned_apps_cache_key(user_pk):
+    return 'jet:pinned_apps:%s' % user_pk
+
+
+def get_pinned_apps(user):
+    if not user or not user_is_authenticated(user):
+        return []
+
+    return get_cached(get_pinned_apps_cache_key(user.pk), lambda: list(
+        PinnedApplication.objects.filter(user=user.pk).values_list('app_label', flat=True)
+    ))
+
+
 def get_app_list(context, order=True):
     admin_site = get_admin_site(context)
     request = context['request']
+    key = get_menu_cache_key('app_list', admin_site, request.user, order)
+
+    return get_cached(key, lambda: build_app_list(admin_site, request, order))
 
+
+def build_app_list(admin_site, request, order=True):
     app_dict = {}
     for model, model_admin in admin_site._registry.items():
         app_label = model._meta.app_label
@@ -77,7 +151,7 @@ def get_app_list(context, order=True):
             if True in perms.values():
                 info = (app_label, model._meta.model_name)
                 model_dict = {
-                    'name': capfirst(model._meta.verbose_name_plural),
+                    'name': force_text(capfirst(model._meta.verbose_name_plural)),
                     'object_name': model._meta.object_name,
                     'perms': perms,
                     'model_name': model._meta.model_name
@@ -241,6 +315,143 @@ def get_model_queryset(admin_site, model, request, preserved_filters=None):
     return queryset
 
 
+class InitialObjectsLoader(object):
+    """
+    Collects the values select2 fields and related filters show labels for
+    and loads them with one in_bulk() per model and field on first use.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.objects = {}
+
+    def to_python(self, model, field_name, values):
+        field = model._meta.pk if field_name == 'pk' else model._meta.get_field(field_name)
+        result = []
+
+        for value in values:
+            try:
+                result.append(field.to_python(value))
+            except ValidationError:
+                pass
+
+        return result
+
+    def add(self, model, values, field_name='pk'):
+        key = (model, field_name)
+        loaded = self.objects.get(key, {})
+        values = [value for value in self.to_python(model, field_name, values) if value not in loaded]
+
+        if values:
+            self.pending.setdefault(key, set()).update(values)
+
+    def get(self, model, values, field_name='pk'):
+        key = (model, field_name)
+        values = self.to_python(model, field_name, values)
+        self.add(model, values, field_name)
+        pending = self.pending.pop(key, None)
+
+        if pending:
+            self.objects.setdefault(key, {}).update(
+                model._default_manager.in_bulk(list(pending), field_name=field_name)
+            )
+
+        objects = self.objects.get(key, {})
+        return [objects[value] for value in values if value in objects]
+
+
+def get_initial_objects_loader(request):
+    if request is None:
+        return InitialObjectsLoader()
+
+    if not hasattr(request, '_jet_initial_objects_loader'):
+        request._jet_initial_objects_loader = InitialObjectsLoader()
+
+    return request._jet_initial_objects_loader
+
+
+def get_ordering_field(model, name):
+    field = None
+    for part in name.split(LOOKUP_SEP):
+        if field is not None:
+            if not field.is_relation:
+                return
+            model = field.related_model
+
+        try:
+            field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return
+
+    return field
+
+
+def get_keyset_ordering(queryset):
+    """
+    Returns the changelist ordering as (name, descending) pairs when every
+    key is a plain not null column, so that the row following an object can
+    be looked up by comparing the keys. Returns None otherwise.
+    """
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    pk_names = ('pk', queryset.model._meta.pk.name)
+    if not any(isinstance(name, str) and name.lstrip('-') in pk_names for name in ordering):
+        ordering.append('pk')
+
+    result = []
+
+    for name in ordering:
+        if not isinstance(name, str) or name == '?':
+            return
+
+        field = get_ordering_field(queryset.model, name.lstrip('-'))
+
+        # relations are ordered by the related model's ordering, not by the key
+        if field is None or field.null or field.is_relation:
+            return
+
+        result.append((name.lstrip('-'), name.startswith('-')))
+
+    return result
+
+
+def get_sibling_object(queryset, instance, next):
+    ordering = get_keyset_ordering(queryset)
+
+    if ordering is None:
+        object_pks = list(queryset.values_list('pk', flat=True))
+
+        try:
+            index = object_pks.index(instance.pk)
+        except ValueError:
+            return
+
+        sibling_index = index + 1 if next else index - 1
+        exists = sibling_index < len(object_pks) if next else sibling_index >= 0
+        return queryset.get(pk=object_pks[sibling_index]) if exists else None
+
+    names = [name for name, descending in ordering]
+    values = queryset.filter(pk=instance.pk).values_list(*names).first()
+
+    if values is None:
+        return
+
+    # (a, b) > (x, y) is a > x or a = x and b > y
+    condition = Q()
+    equal = Q()
+
+    for (name, descending), value in zip(ordering, values):
+        lookup = 'gt' if descending != next else 'lt'
+        condition |= equal & Q(**{'%s__%s' % (name, lookup): value})
+        equal &= Q(**{name: value})
+
+    order_by = [
+        ('-' if descending == next else '') + name
+        for name, descending in ordering
+    ]
+
+    return queryset.filter(condition).order_by(*order_by).first()
+
+
 def get_possible_language_codes():
     language_code = translation.get_language()
 
@@ -262,11 +473,7 @@ def get_possible_language_codes():
 
 
 def get_original_menu_items(context):
-    if context.get('user') and user_is_authenticated(context['user']):
-        pinned_apps = PinnedApplication.objects.filter(user=context['user'].pk).values_list('app_label', flat=True)
-    else:
-        pinned_apps = []
-
+    pinned_apps = get_pinned_apps(context.get('user'))
     original_app_list = get_app_list(context)
 
     return map(lambda app: {
@@ -307,7 +514,31 @@ def get_menu_item_url(url, original_app_list):
 
 
 def get_menu_items(context):
-    pinned_apps = PinnedApplication.objects.filter(user=context['user'].pk).values_list('app_label', flat=True)
+    pinned_apps = get_pinned_apps(context['user'])
+    key = get_menu_cache_key('menu', get_admin_site(context), context['user'], *pinned_apps)
+    app_list = get_cached(key, lambda: build_menu_items(context))
+    current_found = False
+
+    for app in app_list:
+        if not current_found:
+            for model in app['items']:
+                if not current_found and model.get('url') and context['request'].path.startswith(model['url']):
+                    model['current'] = True
+                    current_found = True
+                else:
+                    model['current'] = False
+
+            if not current_found and app.get('url') and context['request'].path.startswith(app['url']):
+                app['current'] = True
+                current_found = True
+            else:
+                app['current'] = False
+
+    return app_list
+
+
+def build_menu_items(context):
+    pinned_apps = get_pinned_apps(context['user'])
     original_app_list = OrderedDict(map(lambda app: (app['app_label'], app), get_original_menu_items(context)))
     custom_app_list = settings.JET_SIDE_MENU_ITEMS
     custom_app_list_deprecated = settings.JET_SIDE_MENU_CUSTOM_APPS
@@ -418,7 +649,7 @@ def get_menu_items(context):
 
                 for model_label in models:
                     if model_label == '__all__':
-                        app['items'] = models_dict[app_label].values()
+                        app['items'] = list(models_dict[app_label].values())
                         break
                     elif model_label in models_dict[app_label]:
                         model = models_dict[app_label][model_label]
@@ -431,23 +662,6 @@ def get_menu_items(context):
             return item
         app_list = list(map(map_item, original_app_list.values()))
 
-    current_found = False
-
-    for app in app_list:
-        if not current_found:
-            for model in app['items']:
-                if not current_found and model.get('url') and context['request'].path.startswith(model['url']):
-                    model['current'] = True
-                    current_found = True
-                else:
-                    model['current'] = False
-
-            if not current_found and app.get('url') and context['request'].path.startswith(app['url']):
-                app['current'] = True
-                current_found = True
-            else:
-                app['current'] = False
-
     return app_list
 
 